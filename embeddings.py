@@ -1,278 +1,539 @@
 #!/usr/bin/env python3
 """
 Generate embeddings using Google Embeddings API - SIMPLE & RELIABLE VERSION
-- No complex retry logic
-- Simple 1-second delays between requests (safe)
+- Batched requests (up to 100 texts per call)
+- Up to 10 requests in flight at once (asyncio)
+- Adaptive delay between requests (speeds up on success, backs off on 429)
 - Uses Google text-embedding-3-large (3072 dimensions)
 """
 
 
+import asyncio
+import hashlib
+import json
+import logging
 import os
-import time
+import sqlite3
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import islice
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 load_dotenv()
 
+# Progress bar is optional
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
 
-# Google client
-client = GoogleGenerativeAIEmbeddings(model="gemini-embedding-001")
+
+# Per-request warnings go to a log file so they don't break the progress bar
+logger = logging.getLogger("embeddings")
+if not logger.handlers:
+    _log_handler = logging.FileHandler(os.getenv("EMBEDDING_LOG_PATH", "embeddings.log"), delay=True)
+    _log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(_log_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+# Google client - created once and reused for every call.
+# gRPC keeps a single HTTP/2 channel open, so requests share one TCP/TLS connection.
+EMBEDDING_MODEL = "gemini-embedding-001"
+
+client = GoogleGenerativeAIEmbeddings(
+    model=EMBEDDING_MODEL,
+    transport=os.getenv("GOOGLE_EMBEDDINGS_TRANSPORT", "grpc"),
+)
+
+
+# Texts sent per embedding request
+EMBED_BATCH_SIZE = 100
+
+# Embedding requests allowed in flight at once
+EMBED_CONCURRENCY = 10
+
+# Storage format for vectors: "none" keeps the raw floats, "int8" stores
+# integers in [-127, 127] plus a per-node scale (n.embedding_scale).
+# Cosine similarity is scale-invariant, so vector indexes keep working on int8.
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "none").lower()
+
+# On-disk cache of embeddings keyed by (model, sha1(text)); set to "" to disable
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".embedding_cache.sqlite")
+
+# Labels to embed, in order: (label, plural used in messages)
+EMBED_LABELS = [
+    ("Function", "functions"),
+    ("Method", "methods"),
+    ("File", "files"),
+    ("Class", "classes"),
+]
+
+# Schema the embedding queries rely on (constraint names match repo_to_neo4j.py)
+SCHEMA_QUERIES = [
+    "CREATE CONSTRAINT func_id IF NOT EXISTS FOR (n:Function) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT method_id IF NOT EXISTS FOR (n:Method) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT file_id IF NOT EXISTS FOR (n:File) REQUIRE n.id IS UNIQUE",
+    "CREATE CONSTRAINT class_id IF NOT EXISTS FOR (n:Class) REQUIRE n.id IS UNIQUE",
+    "CREATE INDEX function_embedding_status IF NOT EXISTS FOR (n:Function) ON (n.embedding_status)",
+    "CREATE INDEX method_embedding_status IF NOT EXISTS FOR (n:Method) ON (n.embedding_status)",
+    "CREATE INDEX file_embedding_status IF NOT EXISTS FOR (n:File) ON (n.embedding_status)",
+    "CREATE INDEX class_embedding_status IF NOT EXISTS FOR (n:Class) ON (n.embedding_status)",
+]
+
+
+# Cypher templates, filled in per label with .format(label=...)
+
+# A node can be claimed if it has never been embedded, or if another worker
+# claimed it but did not finish within $stale_after seconds
+CLAIMABLE_FILTER = """
+    n.embedding_semantics IS NOT NULL
+    AND (n.embedding_status IS NULL
+         OR (n.embedding_status = 'in_progress'
+             AND n.embedding_claimed_at < datetime() - duration({{seconds: $stale_after}})))
+"""
+
+# Failed nodes get one more attempt per run
+RETRY_FAILED_QUERY = """
+    MATCH (n:{label})
+    WHERE n.embedding_status = 'failed'
+    SET n.embedding_status = null
+"""
+
+COUNT_PENDING_QUERY = """
+    MATCH (n:{label})
+    WHERE """ + CLAIMABLE_FILTER + """
+    RETURN count(n) AS cnt
+"""
+
+# Writing the dummy _lock property takes the node's write lock without touching
+# the claim; the filter is then checked again so a node claimed by a concurrent
+# worker in the meantime is skipped, and only the nodes that pass get our claim
+CLAIM_QUERY = """
+    MATCH (n:{label})
+    WHERE """ + CLAIMABLE_FILTER + """
+    WITH n LIMIT $limit
+    SET n._lock = null
+    WITH n
+    WHERE """ + CLAIMABLE_FILTER + """
+    SET n.embedding_claim = $claim,
+        n.embedding_status = 'in_progress',
+        n.embedding_claimed_at = datetime()
+    RETURN n.id AS id, n.embedding_semantics AS text
+"""
+
+RELEASE_QUERY = """
+    MATCH (n:{label})
+    WHERE n.embedding_status = 'in_progress' AND n.embedding_claim = $claim
+    SET n.embedding_status = null
+"""
+
+WRITE_EMBEDDED_QUERY = """
+    UNWIND $rows AS r
+    MATCH (n:{label} {{id: r.id}})
+    SET n.embedding_semantics = r.emb,
+        n.embedding_scale = r.scale,
+        n.embedded_text = r.text,
+        n.embedding_status = 'embedded',
+        n.embedding_timestamp = datetime($now),
+        n.embedding_claim = null,
+        n.embedding_claimed_at = null
+"""
+
+WRITE_FAILED_QUERY = """
+    UNWIND $ids AS id
+    MATCH (n:{label} {{id: id}})
+    SET n.embedding_status = 'failed',
+        n.embedding_claim = null,
+        n.embedding_claimed_at = null
+"""
+
+VERIFY_QUERY = """
+    MATCH (n)
+    WHERE n:Function OR n:Method OR n:File OR n:Class
+    RETURN labels(n)[0] AS label,
+           coalesce(n.embedding_status = 'embedded', false) AS embedded,
+           count(*) AS cnt
+"""
+
+# Pending nodes claimed from Neo4j per page
+EMBED_FETCH_LIMIT = 1000
+
+# Seconds after which another worker's unfinished claim may be taken over
+EMBED_CLAIM_TIMEOUT = 900
+
+# Nodes updated per UNWIND write
+EMBED_WRITE_BATCH_SIZE = 1000
+
+# Retries for a batch that keeps hitting the rate limit
+EMBED_MAX_RETRIES = 5
+
+
+class EmbeddingCache:
+    """
+    Embeddings already computed for a given text, kept in memory for the run
+    and persisted in SQLite across runs.
+    """
+
+    def __init__(self, path: str, model: str):
+        self.model = model
+        self.memory: dict[str, list[float]] = {}
+        self.hits, self.misses = 0, 0
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT, text_sha1 TEXT, embedding TEXT, PRIMARY KEY (model, text_sha1))"
+            )
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {k: self.memory[k] for k in keys if k in self.memory}
+        missing = [k for k in keys if k not in found]
+        if self.conn and missing:
+            for i in range(0, len(missing), 500):
+                chunk = missing[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT text_sha1, embedding FROM embeddings WHERE model = ? "
+                    f"AND text_sha1 IN ({','.join('?' * len(chunk))})",
+                    [self.model, *chunk],
+                )
+                for k, embedding in rows:
+                    found[k] = self.memory[k] = json.loads(embedding)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: dict[str, list[float]]):
+        self.memory.update(items)
+        if self.conn and items:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(self.model, k, json.dumps(v)) for k, v in items.items()],
+            )
+            self.conn.commit()
+
+
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_MODEL)
+
+
+class RateController:
+    """
+    AIMD rate control for embedding requests.
+    Delay shrinks a little after every success and doubles on every rate-limit error.
+    """
+
+    def __init__(self, delay: float = 0.1, min_delay: float = 0.05, max_delay: float = 60.0, step: float = 0.01):
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.step = step
+
+    def on_success(self):
+        self.delay = max(self.min_delay, self.delay - self.step)
+
+    def on_rate_limited(self, retry_after: float | None = None):
+        self.delay = min(self.max_delay, self.delay * 2)
+        if retry_after:
+            self.delay = max(self.delay, min(self.max_delay, retry_after))
+
+    async def sleep(self):
+        await asyncio.sleep(self.delay)
+
+
+rate_controller = RateController()
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    """Check if an API error is a 429 / RESOURCE_EXHAUSTED"""
+    if getattr(e, "code", None) == 429 or getattr(e, "status_code", None) == 429:
+        return True
+    message = str(e)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "ResourceExhausted" in type(e).__name__
+
+
+def _retry_after(e: Exception) -> float | None:
+    """Read the Retry-After hint (seconds) from a rate-limit error, if present"""
+    try:
+        metadata = e.trailing_metadata() if hasattr(e, "trailing_metadata") else None
+        for key, value in metadata or []:
+            if key.lower() == "retry-after":
+                return float(value)
+    except Exception:
+        pass
+    return None
 
 
 # Neo4j connection
 neo4j_driver = GraphDatabase.driver(
     os.getenv("NEO4J_URI"),
-    auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD")),
+    max_connection_pool_size=32,
+    connection_acquisition_timeout=60
 )
 
 
 
-def get_embedding(text: str) -> list[float] | None:
+def quantize_embedding(embedding: list[float]) -> tuple[list, float | None]:
     """
-    Generate an embedding using Google.
+    Quantize an embedding according to EMBEDDING_QUANTIZATION.
+    Returns (values, scale); multiply values by scale to get the original floats back.
+    """
+    if EMBEDDING_QUANTIZATION != "int8":
+        return embedding, None
+
+    scale = max(abs(v) for v in embedding) / 127 or 1.0
+    return [round(v / scale) for v in embedding], scale
+
+
+
+async def get_embedding_async(text: str) -> list[float] | None:
+    """
+    Generate an embedding for a single text using Google.
     Returns the list of floats (3072 dimensions), or None on failure.
     """
     try:
-        response = client.embed_query(text)
-        return response
+        return await client.aembed_query(text)
 
     except Exception as e:
-        print(f"⚠️ Embedding failed: {e}")
+        logger.warning("Embedding failed: %s", e)
         return None
 
 
+async def get_embeddings_batch_async(texts: list[str], sem: asyncio.Semaphore) -> list[list[float] | None]:
+    """
+    Generate embeddings for many texts in a single request, bounded by the given semaphore.
+    Paced by rate_controller; rate-limited batches are retried after backing off.
+    Falls back to one request per text only on errors other than rate limiting.
+    """
+    async with sem:
+        for _ in range(EMBED_MAX_RETRIES):
+            await rate_controller.sleep()
+            try:
+                embeddings = await client.aembed_documents(texts)
+                rate_controller.on_success()
+                return embeddings
+            except Exception as e:
+                if _is_rate_limited(e):
+                    rate_controller.on_rate_limited(_retry_after(e))
+                    logger.warning("Rate limited, backing off to %.2fs", rate_controller.delay)
+                    continue
+                logger.warning("Batch embedding failed (%s), retrying one by one", e)
+                return [await get_embedding_async(text) for text in texts]
 
-def embed_functions():
-    """Embed functions - replace text embeddings with vector embeddings"""
-    print("\n" + "="*60)
-    print("EMBEDDING FUNCTIONS")
-    print("="*60)
+        # Still rate limited: mark the batch failed so the next run retries it,
+        # rather than sending one unpaced request per text
+        logger.warning("Batch still rate limited after %d attempts, giving up", EMBED_MAX_RETRIES)
+        return [None] * len(texts)
 
-    with neo4j_driver.session() as session:
-        result = session.run("""
-            MATCH (f:Function) 
-            WHERE f.embedding_semantics IS NOT NULL
-            RETURN f.id, f.name, f.embedding_semantics
-            LIMIT 1000
-        """)
-        
-        nodes = result.data()
-        text_nodes = [n for n in nodes if isinstance(n['f.embedding_semantics'], str)]
-        total_count = len(text_nodes)
-
-        print(f"Total functions to embed: {total_count}\n")
-
-        if total_count == 0:
-            print("✓ All functions already embedded!")
-            return
 
-        embedded, skipped = 0, 0
+async def _embed_texts_async(texts: list[str], progress=None) -> list[list[float] | None]:
+    """Embed all texts in batches, with up to EMBED_CONCURRENCY batches in flight"""
+    sem = asyncio.Semaphore(EMBED_CONCURRENCY)
+    batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
 
-        for i, func_data in enumerate(text_nodes, 1):
-            func_id = func_data['f.id']
-            func_name = func_data['f.name']
-            text_to_embed = func_data['f.embedding_semantics'] or ""  # This is the semantic text
+    async def run(batch):
+        embeddings = await get_embeddings_batch_async(batch, sem)
+        if progress is not None:
+            progress.update(len(batch))
+        return embeddings
 
-            print(f"[{i}/{total_count}] Embedding {func_name}... ", end="", flush=True)
-            embedding = get_embedding(text_to_embed)
+    results = await asyncio.gather(*(run(batch) for batch in batches))
+    return [embedding for batch_result in results for embedding in batch_result]
 
-            if embedding:
-                session.run("""
-                    MATCH (f:Function {id: $id})
-                    SET f.embedding_semantics = $embedding,
-                        f.embedded_text = $text,
-                        f.embedding_status = 'embedded',
-                        f.embedding_timestamp = datetime()
-                """, id=func_id, embedding=embedding, text=text_to_embed)
-                print("✓")
-                embedded += 1
-            else:
-                session.run("""
-                    MATCH (f:Function {id: $id})
-                    SET f.embedding_status = 'failed'
-                """, id=func_id)
-                print("✗")
-                skipped += 1
 
-            time.sleep(1.0)
 
-        print(f"\n✓ Embedded: {embedded}")
-        print(f"✗ Failed: {skipped}")
+# Event loop shared by every embedding call in the process
+_loop = None
 
 
-def embed_methods():
-    """Embed methods - replace text embeddings with vector embeddings"""
+def _run(coro):
+    """
+    Run a coroutine on the module's single event loop. The async Google client
+    stays bound to the first loop it is used on, so every entry point
+    (embed_all, embed_label, embed_functions, ...) has to share one.
+    """
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+def embed_label(label: str, plural: str, session=None):
+    """Embed all nodes of one label - replace text embeddings with vector embeddings"""
+    if session is None:
+        with neo4j_driver.session() as session:
+            return embed_label(label, plural, session)
+
+    _run(_embed_label_async(label, plural, session))
+
+
+async def _embed_label_async(label: str, plural: str, session):
+    """Body of embed_label, run on the module's event loop (see _run)"""
     print("\n" + "="*60)
-    print("EMBEDDING METHODS")
+    print(f"EMBEDDING {plural.upper()}")
     print("="*60)
 
-    with neo4j_driver.session() as session:
-        result = session.run("""
-            MATCH (m:Method) 
-            WHERE m.embedding_semantics IS NOT NULL
-            RETURN m.id, m.name, m.embedding_semantics
-            LIMIT 1000
-        """)
-        
-        nodes = result.data()
-        text_nodes = [n for n in nodes if isinstance(n['m.embedding_semantics'], str)]
-        total_count = len(text_nodes)
-
-        print(f"Total methods to embed: {total_count}\n")
-
-        if total_count == 0:
-            print("✓ All methods already embedded!")
+    session.execute_write(_run_write, RETRY_FAILED_QUERY.format(label=label))
+    total_count = _count_pending(label)
+
+    print(f"Total {plural} to embed: {total_count}\n")
+
+    if total_count == 0:
+        print(f"✓ All {plural} already embedded!")
+        return
+
+    embedded, failed = 0, 0
+    claim = uuid.uuid4().hex
+    pending = _iter_pending(session, label, claim)
+    progress = tqdm(total=total_count, desc=f"Embedding {plural}", unit="node") if tqdm else None
+
+    try:
+        while text_nodes := list(islice(pending, EMBED_FETCH_LIMIT)):
+            page_embedded, page_failed = await _embed_page(session, label, text_nodes, progress)
+            embedded += page_embedded
+            failed += page_failed
+            if progress is None:
+                print(f"[{embedded + failed}/{total_count}] {plural} processed", flush=True)
+    finally:
+        if progress is not None:
+            progress.close()
+        # Hand back anything this run claimed but did not finish (e.g. Ctrl+C)
+        session.execute_write(_run_write, RELEASE_QUERY.format(label=label), claim=claim)
+
+    print(f"\n✓ Embedded: {embedded}")
+    print(f"✗ Failed: {failed}")
+
+
+def _iter_pending(session, label: str, claim: str):
+    """
+    Claim pending nodes of a label a page at a time and yield (id, text) for each.
+    Claimed nodes are marked 'in_progress', so concurrent workers never get the same node.
+    """
+    claim_query = CLAIM_QUERY.format(label=label)
+
+    while True:
+        claimed = session.execute_write(_claim_page, claim_query, claim)
+        if claimed:
+            yield from claimed
+        elif _count_pending(label) == 0:
+            # An empty page can also mean every candidate was taken concurrently
             return
 
-        embedded, skipped = 0, 0
 
-        for i, method_data in enumerate(text_nodes, 1):
-            method_id = method_data['m.id']
-            method_name = method_data['m.name']
-            text_to_embed = method_data['m.embedding_semantics'] or ""
+def _count_pending(label: str) -> int:
+    """Number of nodes of a label that are still waiting to be claimed"""
+    records, _, _ = neo4j_driver.execute_query(
+        COUNT_PENDING_QUERY.format(label=label), stale_after=EMBED_CLAIM_TIMEOUT
+    )
+    return records[0]['cnt']
 
-            print(f"[{i}/{total_count}] Embedding {method_name}... ", end="", flush=True)
-            embedding = get_embedding(text_to_embed)
 
-            if embedding:
-                session.run("""
-                    MATCH (m:Method {id: $id})
-                    SET m.embedding_semantics = $embedding,
-                        m.embedded_text = $text,
-                        m.embedding_status = 'embedded',
-                        m.embedding_timestamp = datetime()
-                """, id=method_id, embedding=embedding, text=text_to_embed)
-                print("✓")
-                embedded += 1
-            else:
-                session.run("""
-                    MATCH (m:Method {id: $id})
-                    SET m.embedding_status = 'failed'
-                """, id=method_id)
-                print("✗")
-                skipped += 1
+def _claim_page(tx, query: str, claim: str) -> list[tuple[str, str]]:
+    """Transaction function: claim one page of nodes and return their (id, text)"""
+    result = tx.run(query, claim=claim, limit=EMBED_FETCH_LIMIT, stale_after=EMBED_CLAIM_TIMEOUT)
+    return [(record["id"], record["text"]) for record in result]
 
-            time.sleep(1.0)
 
-        print(f"\n✓ Embedded: {embedded}")
-        print(f"✗ Failed: {skipped}")
+def _run_write(tx, query: str, **params):
+    """Transaction function for execute_write (retried by the driver on transient errors)"""
+    tx.run(query, **params).consume()
 
 
-def embed_files():
-    """Embed files - replace text embeddings with vector embeddings"""
-    print("\n" + "="*60)
-    print("EMBEDDING FILES")
-    print("="*60)
+async def _embed_page(session, label: str, text_nodes: list[tuple[str, str]], progress=None) -> tuple[int, int]:
+    """Embed one page of (id, text) pairs and write the results back; returns (embedded, failed)"""
+    ids = [node_id for node_id, _ in text_nodes]
+    texts = [text or "" for _, text in text_nodes]
 
-    with neo4j_driver.session() as session:
-        result = session.run("""
-            MATCH (f:File) 
-            WHERE f.embedding_semantics IS NOT NULL
-            RETURN f.id, f.name, f.embedding_semantics
-            LIMIT 1000
-        """)
-        
-        nodes = result.data()
-        text_nodes = [n for n in nodes if isinstance(n['f.embedding_semantics'], str)]
-        total_count = len(text_nodes)
-
-        print(f"Total files to embed: {total_count}\n")
-
-        if total_count == 0:
-            print("✓ All files already embedded!")
-            return
+    # Only send each distinct, not-yet-cached text to the API once
+    keys = {text: EmbeddingCache.key(text) for text in texts}
+    cached = embedding_cache.get_many(list(set(keys.values())))
+    to_embed = [text for text, k in keys.items() if k not in cached]
+    logger.info("Cache: %d hit, %d to embed (%d nodes)", len(cached), len(to_embed), len(texts))
 
-        embedded, skipped = 0, 0
+    if to_embed:
+        new_embeddings = await _embed_texts_async(to_embed, progress)
+        fresh = {keys[text]: emb for text, emb in zip(to_embed, new_embeddings) if emb}
+        embedding_cache.put_many(fresh)
+        cached.update(fresh)
 
-        for i, file_data in enumerate(text_nodes, 1):
-            file_id = file_data['f.id']
-            file_name = file_data['f.name']
-            text_to_embed = file_data['f.embedding_semantics'] or ""
+    embeddings = [cached.get(keys[text]) for text in texts]
+    if progress is not None:
+        # Nodes served from the cache or sharing a text with another node
+        progress.update(len(texts) - len(to_embed))
 
-            print(f"[{i}/{total_count}] Embedding {file_name}... ", end="", flush=True)
-            embedding = get_embedding(text_to_embed)
+    embedded_rows, failed_ids = [], []
 
-            if embedding:
-                session.run("""
-                    MATCH (f:File {id: $id})
-                    SET f.embedding_semantics = $embedding,
-                        f.embedded_text = $text,
-                        f.embedding_status = 'embedded',
-                        f.embedding_timestamp = datetime()
-                """, id=file_id, embedding=embedding, text=text_to_embed)
-                print("✓")
-                embedded += 1
-            else:
-                session.run("""
-                    MATCH (f:File {id: $id})
-                    SET f.embedding_status = 'failed'
-                """, id=file_id)
-                print("✗")
-                skipped += 1
+    for node_id, text_to_embed, embedding in zip(ids, texts, embeddings):
+        if embedding:
+            values, scale = quantize_embedding(embedding)
+            embedded_rows.append({"id": node_id, "emb": values, "scale": scale, "text": text_to_embed})
+        else:
+            failed_ids.append(node_id)
 
-            time.sleep(1.0)
+    write_embedded = WRITE_EMBEDDED_QUERY.format(label=label)
+    now = datetime.now(timezone.utc).isoformat()
+    for i in range(0, len(embedded_rows), EMBED_WRITE_BATCH_SIZE):
+        session.execute_write(_run_write, write_embedded, rows=embedded_rows[i:i + EMBED_WRITE_BATCH_SIZE], now=now)
 
-        print(f"\n✓ Embedded: {embedded}")
-        print(f"✗ Failed: {skipped}")
+    write_failed = WRITE_FAILED_QUERY.format(label=label)
+    for i in range(0, len(failed_ids), EMBED_WRITE_BATCH_SIZE):
+        session.execute_write(_run_write, write_failed, ids=failed_ids[i:i + EMBED_WRITE_BATCH_SIZE])
 
+    return len(embedded_rows), len(failed_ids)
 
-def embed_classes():
-    """Embed classes - replace text embeddings with vector embeddings"""
-    print("\n" + "="*60)
-    print("EMBEDDING CLASSES")
-    print("="*60)
 
+def ensure_schema(session=None):
+    """Create the id constraints and embedding_status indexes (no-op if present)"""
+    if session is None:
+        with neo4j_driver.session() as session:
+            return ensure_schema(session)
+
+    for query in SCHEMA_QUERIES:
+        try:
+            session.run(query).consume()
+        except Exception as e:
+            logger.warning("Schema query failed (%s): %s", query, e)
+
+
+def embed_all():
+    """Embed every label in EMBED_LABELS over one shared session and event loop"""
     with neo4j_driver.session() as session:
-        result = session.run("""
-            MATCH (c:Class) 
-            WHERE c.embedding_semantics IS NOT NULL
-            RETURN c.id, c.name, c.embedding_semantics
-            LIMIT 1000
-        """)
-        
-        nodes = result.data()
-        text_nodes = [n for n in nodes if isinstance(n['c.embedding_semantics'], str)]
-        total_count = len(text_nodes)
-
-        print(f"Total classes to embed: {total_count}\n")
-
-        if total_count == 0:
-            print("✓ All classes already embedded!")
-            return
+        ensure_schema(session)
+        _run(_embed_all_async(session))
 
-        embedded, skipped = 0, 0
 
-        for i, class_data in enumerate(text_nodes, 1):
-            class_id = class_data['c.id']
-            class_name = class_data['c.name']
-            text_to_embed = class_data['c.embedding_semantics'] or ""
+async def _embed_all_async(session):
+    for label, plural in EMBED_LABELS:
+        await _embed_label_async(label, plural, session)
 
-            print(f"[{i}/{total_count}] Embedding {class_name}... ", end="", flush=True)
-            embedding = get_embedding(text_to_embed)
 
-            if embedding:
-                session.run("""
-                    MATCH (c:Class {id: $id})
-                    SET c.embedding_semantics = $embedding,
-                        c.embedded_text = $text,
-                        c.embedding_status = 'embedded',
-                        c.embedding_timestamp = datetime()
-                """, id=class_id, embedding=embedding, text=text_to_embed)
-                print("✓")
-                embedded += 1
-            else:
-                session.run("""
-                    MATCH (c:Class {id: $id})
-                    SET c.embedding_status = 'failed'
-                """, id=class_id)
-                print("✗")
-                skipped += 1
+def embed_functions():
+    """Embed functions - replace text embeddings with vector embeddings"""
+    embed_label("Function", "functions")
 
-            time.sleep(1.0)
 
-        print(f"\n✓ Embedded: {embedded}")
-        print(f"✗ Failed: {skipped}")
+def embed_methods():
+    """Embed methods - replace text embeddings with vector embeddings"""
+    embed_label("Method", "methods")
+
+
+def embed_files():
+    """Embed files - replace text embeddings with vector embeddings"""
+    embed_label("File", "files")
+
+
+def embed_classes():
+    """Embed classes - replace text embeddings with vector embeddings"""
+    embed_label("Class", "classes")
 
 
 
@@ -282,65 +543,46 @@ def verify():
     print("VERIFICATION")
     print("="*60 + "\n")
 
-    with neo4j_driver.session() as session:
-        # Count by embedding status
-        functions_embedded = session.run(
-            "MATCH (f:Function) WHERE f.embedding_status = 'embedded' RETURN count(f) as cnt"
-        ).single()['cnt']
-        
-        methods_embedded = session.run(
-            "MATCH (m:Method) WHERE m.embedding_status = 'embedded' RETURN count(m) as cnt"
-        ).single()['cnt']
-        
-        files_embedded = session.run(
-            "MATCH (f:File) WHERE f.embedding_status = 'embedded' RETURN count(f) as cnt"
-        ).single()['cnt']
-        
-        classes_embedded = session.run(
-            "MATCH (c:Class) WHERE c.embedding_status = 'embedded' RETURN count(c) as cnt"
-        ).single()['cnt']
-
-        total_embedded = functions_embedded + methods_embedded + files_embedded + classes_embedded
-        
-        print(f"✅ SUCCESSFULLY EMBEDDED:")
-        print(f"Functions: {functions_embedded}")
-        print(f"Methods: {methods_embedded}")
-        print(f"Files: {files_embedded}")
-        print(f"Classes: {classes_embedded}")
-        print(f"TOTAL: {total_embedded}\n")
-        
-
-        # Also show nodes without embeddings
-        functions_not_embedded = session.run(
-            "MATCH (f:Function) WHERE f.embedding_status IS NULL OR f.embedding_status <> 'embedded' RETURN count(f) as cnt"
-        ).single()['cnt']
-
-        methods_not_embedded = session.run(
-            "MATCH (m:Method) WHERE m.embedding_status IS NULL OR m.embedding_status <> 'embedded' RETURN count(m) as cnt"
-        ).single()['cnt']
-
-        classes_not_embedded = session.run(
-            "MATCH (c:Class) WHERE c.embedding_status IS NULL OR c.embedding_status <> 'embedded' RETURN count(c) as cnt"
-        ).single()['cnt']
-
-        files_not_embedded = session.run(
-            "MATCH (f:File) WHERE f.embedding_status IS NULL OR f.embedding_status <> 'embedded' RETURN count(f) as cnt"
-        ).single()['cnt']
-
-        print(f"⏭️  NOT EMBEDDED (no docstring):")
-        print(f"Functions: {functions_not_embedded}")
-        print(f"Methods: {methods_not_embedded}")
-        print(f"Classes: {classes_not_embedded}")
-        print(f"Files: {files_not_embedded}")
+    # Count by label and embedding status in a single pass
+    records, _, _ = neo4j_driver.execute_query(VERIFY_QUERY)
+
+    embedded = defaultdict(int)
+    not_embedded = defaultdict(int)
+    for record in records:
+        counts = embedded if record['embedded'] else not_embedded
+        counts[record['label']] += record['cnt']
+
+    total_embedded = sum(embedded.values())
+    
+    print(f"✅ SUCCESSFULLY EMBEDDED:")
+    print(f"Functions: {embedded['Function']}")
+    print(f"Methods: {embedded['Method']}")
+    print(f"Files: {embedded['File']}")
+    print(f"Classes: {embedded['Class']}")
+    print(f"TOTAL: {total_embedded}\n")
+
+    # Also show nodes without embeddings
+    print(f"⏭️  NOT EMBEDDED (no docstring):")
+    print(f"Functions: {not_embedded['Function']}")
+    print(f"Methods: {not_embedded['Method']}")
+    print(f"Classes: {not_embedded['Class']}")
+    print(f"Files: {not_embedded['File']}")
 
 
 
 
 def close_driver():
     """Close Neo4j driver"""
-    global neo4j_driver
+    global neo4j_driver, _loop
     if neo4j_driver:
         neo4j_driver.close()
+    if _loop is not None:
+        _loop.close()
+        _loop = None
+    if embedding_cache.conn:
+        print(f"Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses")
+        embedding_cache.conn.close()
+        embedding_cache.conn = None
 
 
 
@@ -349,16 +591,14 @@ if __name__ == "__main__":
     print("Google EMBEDDING - SIMPLE & RELIABLE")
     print("="*60)
     print("\nStrategy:")
-    print("  • 1 second delay between requests")
-    print("  • = 60 requests/minute (safe)")
-    print("  • Simple, reliable, no complex logic")
+    print(f"  • Up to {EMBED_BATCH_SIZE} texts per request")
+    print(f"  • Up to {EMBED_CONCURRENCY} requests in flight")
+    print("  • Adaptive delay between requests (AIMD)")
+    print("  • Backs off automatically on rate limits (429)")
     print("="*60)
 
     try:
-        embed_functions()
-        embed_methods()
-        embed_files()
-        embed_classes()
+        embed_all()
         verify()
 
         print("\n" + "="*60)
@@ -367,7 +607,7 @@ if __name__ == "__main__":
 
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
-        print("Run again to resume from where it stopped")
+        print("Run again to resume from where it stopped (several runs can also work side by side)")
 
     except Exception as e:
         print(f"\n✗ Error: {e}")
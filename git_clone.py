@@ -14,9 +14,17 @@ def clone_repo(repo_url=None,branch_name=None, clone_dir=None):
         # Create the full path where the repo will be cloned
         clone_path = Path(os.getcwd()) / clone_dir
 
-        # Clone the repository into the specified directory
+        # Shallow, single-branch clone: only the current files are analyzed, not history.
+        # GIT_TERMINAL_PROMPT=0 makes private/unknown repos fail fast instead of waiting for credentials.
         print(f"Cloning repository from {repo_url} to {clone_path}")
-        git.Repo.clone_from(repo_url, clone_path,branch=branch_name)
+        git.Repo.clone_from(
+            repo_url,
+            clone_path,
+            branch=branch_name,
+            depth=1,
+            single_branch=True,
+            env={"GIT_TERMINAL_PROMPT": "0"},
+        )
         print("Repository cloned successfully.")
         
         # Return the path as a Path object
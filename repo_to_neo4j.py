@@ -23,31 +23,46 @@ Version: 1.0.0 Production
 
 import argparse
 import ast
+import asyncio
+import contextlib
+import csv
 import hashlib
 import json
 import os
+import queue
 import sys
 import subprocess
+import uuid
 from datetime import datetime
 import re
 
 from pathlib import Path
-from typing import Dict, List, Tuple, Set, Optional, Any
-from dataclasses import dataclass, asdict, field
+from typing import Dict, Iterable, Iterator, List, Tuple, Set, Optional, Any
+from dataclasses import dataclass, field
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from enum import Enum
+from functools import lru_cache, partial
+from inspect import cleandoc
 from datetime import datetime
 from git_clone import clone_repo
 
 
 # Try to import Neo4j driver, install if needed
 try:
-    from neo4j import GraphDatabase
+    from neo4j import AsyncGraphDatabase, GraphDatabase
     NEO4J_AVAILABLE = True
 except ImportError:
     NEO4J_AVAILABLE = False
     print("⚠️  Neo4j driver not installed. Will skip Neo4j loading unless installed.")
 
+# Try to import orjson for faster JSONL output, fall back to json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Try to load environment variables
 try:
     from dotenv import load_dotenv
@@ -59,6 +74,7 @@ except ImportError:
 # ===== EMBEDDING IMPORTS =====
 try:
     from embeddings import (
+        embed_all,
         embed_functions,
         embed_files,
         embed_methods,
@@ -75,6 +91,7 @@ try:
 except ImportError:
     EMBEDDING_AVAILABLE = False
     # Create dummy functions if embeddings module is not available
+    embed_all = lambda: None
     embed_functions = lambda: None
     embed_files = lambda: None
     embed_classes = lambda: None
@@ -114,9 +131,37 @@ class EdgeType(str, Enum):
     HAS_PARAMETER = "HAS_PARAMETER"
 
 
+# Plain string values of the enum members used when emitting records
+_NT_REPOSITORY = NodeType.REPOSITORY.value
+_NT_DIRECTORY = NodeType.DIRECTORY.value
+_NT_FILE = NodeType.FILE.value
+_NT_CLASS = NodeType.CLASS.value
+_NT_FUNCTION = NodeType.FUNCTION.value
+_NT_METHOD = NodeType.METHOD.value
+_NT_VARIABLE = NodeType.VARIABLE.value
+_NT_PARAMETER = NodeType.PARAMETER.value
+_NT_IMPORT = NodeType.IMPORT.value
+_NT_DECORATOR = NodeType.DECORATOR.value
+_ET_CONTAINS = EdgeType.CONTAINS.value
+_ET_IMPORTS = EdgeType.IMPORTS.value
+_ET_DEFINES = EdgeType.DEFINES.value
+_ET_CALLS = EdgeType.CALLS.value
+_ET_INHERITS = EdgeType.INHERITS.value
+_ET_DECORATES = EdgeType.DECORATES.value
+_ET_RETURNS = EdgeType.RETURNS.value
+_ET_RAISES = EdgeType.RAISES.value
+_ET_HAS_PARAMETER = EdgeType.HAS_PARAMETER.value
+
+
 @dataclass
 class CodeMetrics:
     """Comprehensive code quality metrics"""
+    __slots__ = (
+        "lines_of_code", "complexity", "num_parameters", "num_returns",
+        "num_branches", "num_loops", "has_docstring", "num_decorators",
+        "max_nesting_depth",
+    )
+    
     lines_of_code: int
     complexity: int
     num_parameters: int
@@ -125,7 +170,11 @@ class CodeMetrics:
     num_loops: int
     has_docstring: bool
     num_decorators: int
-    max_nesting_depth: int = 0
+    max_nesting_depth: int
+    
+    def to_dict(self) -> Dict:
+        """Shallow dict of the metrics (all fields are scalars, so no asdict deep copy)"""
+        return {name: getattr(self, name) for name in self.__slots__}
 
 
 # ============================================================================
@@ -133,25 +182,144 @@ class CodeMetrics:
 # ============================================================================
 
 def sha1_hex(s: str) -> str:
-    """Generate SHA1 hash of string"""
-    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+    """Generate SHA1 hash of string (IDs only, so skip the security-mode check)"""
+    return hashlib.sha1(s.encode("utf-8"), usedforsecurity=False).hexdigest()
 
 
+@lru_cache(maxsize=65536)
 def stable_id(*parts: str) -> str:
     """Create stable ID from parts"""
-    return sha1_hex("::".join(str(p) for p in parts))
+    return sha1_hex("::".join(map(str, parts)))
+
+
+_STDLIB_MODULES = frozenset({
+    'abc', 'argparse', 'ast', 'asyncio', 'collections', 'copy',
+    'dataclasses', 'datetime', 'enum', 'functools', 'hashlib',
+    'itertools', 'json', 'logging', 'math', 'os', 'pathlib',
+    'pickle', 're', 'sys', 'time', 'typing', 'unittest'
+})
+
+
+@lru_cache(maxsize=1024)
+def _is_stdlib(module_name: str) -> bool:
+    """Check if module is from standard library"""
+    return module_name.partition('.')[0] in _STDLIB_MODULES
+
 
+# Per-type increments for (complexity, returns, branches, loops)
+_METRIC_DELTAS = {
+    ast.If: (1, 0, 1, 0),
+    ast.IfExp: (0, 0, 1, 0),
+    ast.For: (1, 0, 0, 1),
+    ast.While: (1, 0, 0, 1),
+    ast.Return: (0, 1, 0, 0),
+    ast.And: (1, 0, 0, 0),
+    ast.Or: (1, 0, 0, 0),
+    ast.ExceptHandler: (1, 0, 0, 0),
+    ast.With: (1, 0, 0, 0),
+    ast.Assert: (1, 0, 0, 0),
+}
 
-def calculate_complexity(node: ast.AST) -> int:
-    """Calculate McCabe cyclomatic complexity"""
+# Line split used by ast.get_source_segment: keeps line endings, only breaks on \r\n, \r, \n
+_SEGMENT_LINE_RE = re.compile(r'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z')
+
+# names entry for a name that is neither imported nor defined
+_UNBOUND = (None, None)
+
+# Function definition node types
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+# Statements that increase nesting depth
+_NESTING_TYPES = frozenset({ast.For, ast.While, ast.If, ast.With, ast.Try})
+
+
+def compute_function_metrics(node: ast.AST) -> Tuple[int, int, int, int, int]:
+    """
+    Compute (complexity, returns, branches, loops, max_nesting_depth) in one pass.
+    Nesting depth only follows chains of directly nested For/While/If/With/Try
+    statements, so any other node breaks the chain.
+    """
     complexity = 1
-    for child in ast.walk(node):
-        if isinstance(child, (ast.If, ast.For, ast.While, ast.And, ast.Or,
-                             ast.ExceptHandler, ast.With, ast.Assert)):
-            complexity += 1
-        elif isinstance(child, ast.BoolOp):
-            complexity += len(child.values) - 1
-    return complexity
+    num_returns = num_branches = num_loops = max_depth = 0
+    
+    iter_children = ast.iter_child_nodes
+    get_delta = _METRIC_DELTAS.get
+    nesting_types = _NESTING_TYPES
+    bool_op = ast.BoolOp
+    
+    # (node, nesting depth of its parent or None once the chain is broken)
+    stack = [(child, 0) for child in iter_children(node)]
+    pop = stack.pop
+    push = stack.append
+    
+    while stack:
+        current, depth = pop()
+        current_type = type(current)
+        
+        delta = get_delta(current_type)
+        if delta is not None:
+            complexity += delta[0]
+            num_returns += delta[1]
+            num_branches += delta[2]
+            num_loops += delta[3]
+        elif current_type is bool_op:
+            complexity += len(current.values) - 1
+        
+        if depth is not None and current_type in nesting_types:
+            depth += 1
+            if depth > max_depth:
+                max_depth = depth
+        else:
+            depth = None
+        
+        for child in iter_children(current):
+            push((child, depth))
+    
+    return complexity, num_returns, num_branches, num_loops, max_depth
+
+
+def _fast_unparse(node: ast.AST) -> Optional[str]:
+    """
+    ast.unparse output for the common leaf expressions (names, dotted names,
+    simple constants) without running the full unparser; None for anything else
+    """
+    node_type = type(node)
+    if node_type is ast.Name:
+        return node.id
+    
+    if node_type is ast.Attribute:
+        name = ""
+        while node_type is ast.Attribute:
+            name = f".{node.attr}{name}"
+            node = node.value
+            node_type = type(node)
+        # Anything other than a plain name at the root needs the real unparser
+        return node.id + name if node_type is ast.Name else None
+    
+    if node_type is ast.Constant and node.kind is None:
+        value = node.value
+        value_type = type(value)
+        if value_type is int or value_type is bool or value is None:
+            return repr(value)
+        if value_type is str:
+            # repr() only agrees with ast.unparse when no quoting/escaping choices arise
+            if value.isprintable() and "'" not in value and '"' not in value and "\\" not in value:
+                return repr(value)
+        elif value is Ellipsis:
+            return "..."
+    
+    return None
+
+
+def _fast_docstring(body: List[ast.stmt]) -> Optional[str]:
+    """ast.get_docstring for a known def/class body, without the node type checks"""
+    if body:
+        first = body[0]
+        if type(first) is ast.Expr:
+            value = first.value
+            if type(value) is ast.Constant and type(value.value) is str:
+                return cleandoc(value.value)
+    return None
 
 
 def print_header(title: str, char="="):
@@ -167,6 +335,18 @@ def print_section(title: str):
     print(f"📌 {title}")
     print(f"{'─' * 80}")
 
+def ask_yes_no(prompt: str, answer: Optional[bool] = None) -> bool:
+    """
+    Answer a yes/no question: the answer given by a CLI flag if any, else the
+    user's reply when stdin is a terminal, else no (so scripted runs never block)
+    """
+    if answer is not None:
+        return answer
+    if not sys.stdin.isatty():
+        print(f"{prompt}no (non-interactive)")
+        return False
+    return input(prompt).lower() == 'yes'
+
 def generate_embedding_text(node_type: str, **kwargs) -> str:
     """
     Generate text for embedding.
@@ -254,23 +434,41 @@ def generate_embedding_text(node_type: str, **kwargs) -> str:
 class ComprehensiveExtractor(ast.NodeVisitor):
     """Enhanced AST visitor for comprehensive code extraction with hierarchy"""
     
-    def __init__(self, repo_root: Path, file_path: Path, src: str, tree: ast.AST = None):
+    # visit_* method (or None) per AST node class, filled in lazily;
+    # every subclass gets its own, so overrides are never shared with the base
+    _dispatch: Dict[type, Any] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
+    
+    def __init__(self, repo_root: Path, file_path: Path, src: str, tree: ast.AST = None,
+                 emit_node=None, emit_edge=None):
         self.repo_root = repo_root
         self.file_path = file_path
         self.src = src
         self.tree = tree
         self.nodes: List[Dict] = []
         self.edges: List[Dict] = []
+        # Records go to the given callbacks (e.g. a JSONL serializer) or are
+        # collected in self.nodes / self.edges
+        self._node_sink = emit_node or self.nodes.append
+        self._edge_sink = emit_edge or self.edges.append
+        # id -> label of every node emitted for this file (edge endpoints never leave the file)
+        self.node_labels: Dict[str, str] = {}
         
         # Context tracking
         self.current_scope_stack: List[str] = []
         self.current_function = None
         self.current_class = None
         
-        # Name resolution
-        self.imports_map: Dict[str, str] = {}
-        self.defined_names: Dict[str, str] = {}
+        # Name resolution: name -> (import target, id of the node defining it).
+        # One map so visit_Call resolves both with a single lookup; a name can
+        # be imported and (re)defined in the same file, so both slots are kept.
+        self.names: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
         self.scope_vars: Dict[str, Set[str]] = defaultdict(set)
+        # Bound lookup for visit_Call (the map is only mutated, never rebound)
+        self._names_get = self.names.get
         
         # Statistics
         self.stats = {
@@ -278,7 +476,65 @@ class ComprehensiveExtractor(ast.NodeVisitor):
             "imports": 0, "calls": 0, "variables": 0, "decorators": 0
         }
         
-        self.file_id = stable_id(str(self.file_path))
+        # File-level constants, computed once per file
+        self.file_path_str = str(self.file_path)
+        self.relpath = str(self.file_path.relative_to(self.repo_root))
+        self.module_name = self.relpath.replace('/', '.').replace('\\', '.').replace('.py', '')
+        self.file_id = stable_id(self.file_path_str)
+        
+        # Source lines, split once per file instead of once per node
+        self._lines = src.splitlines()
+        # Same split ast.get_source_segment uses (keeps line endings, ignores form feeds)
+        self._segment_lines = _SEGMENT_LINE_RE.findall(src)
+    
+    def visit(self, node: ast.AST):
+        """Same as NodeVisitor.visit, but looks the visit_* method up once per node class"""
+        node_class = node.__class__
+        try:
+            method = self._dispatch[node_class]
+        except KeyError:
+            method = self._dispatch[node_class] = getattr(type(self), 'visit_' + node_class.__name__, None)
+        if method is None:
+            return self.generic_visit(node)
+        return method(self, node)
+    
+    def generic_visit(self, node: ast.AST):
+        """Same traversal order as NodeVisitor.generic_visit, with fewer lookups per field"""
+        visit = self.visit
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if value.__class__ is list:
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        visit(item)
+            elif isinstance(value, ast.AST):
+                visit(value)
+    
+    def _emit_node(self, node: Dict):
+        """Emit a node record, remembering its label for later edge endpoints"""
+        self.node_labels[node["id"]] = node["type"]
+        self._node_sink(node)
+    
+    def _emit_edge(self, edge: Dict):
+        """Emit an edge record tagged with its endpoint labels, so the loader can MATCH by label"""
+        labels = self.node_labels
+        from_label = labels.get(edge["from_id"])
+        if from_label is not None:
+            edge["from_label"] = from_label
+        to_id = edge.get("to_id")
+        if to_id is not None:
+            to_label = labels.get(to_id)
+            if to_label is not None:
+                edge["to_label"] = to_label
+        self._edge_sink(edge)
+    
+    def _bind_import(self, name: str, target: str):
+        """Record that name refers to an imported target"""
+        self.names[name] = (target, self._names_get(name, _UNBOUND)[1])
+    
+    def _bind_definition(self, name: str, node_id: str):
+        """Record the node that defines name in this file"""
+        self.names[name] = (self._names_get(name, _UNBOUND)[0], node_id)
     
     def _get_current_scope(self) -> str:
         """
@@ -288,15 +544,15 @@ class ComprehensiveExtractor(ast.NodeVisitor):
     
     def record_file_node(self) -> str:
         """Create file node with comprehensive metadata"""
-        relpath = str(self.file_path.relative_to(self.repo_root))
-        module_name = relpath.replace('/', '.').replace('\\', '.').replace('.py', '')
-        lines = self.src.splitlines()
+        relpath = self.relpath
+        module_name = self.module_name
+        lines = self._lines
         
         node = {
             "id": self.file_id,
-            "type": NodeType.FILE.value,
+            "type": _NT_FILE,
             "name": self.file_path.name,
-            "path": str(self.file_path),
+            "path": self.file_path_str,
             "relpath": relpath,
             "module": module_name,
             "extension": self.file_path.suffix,
@@ -315,29 +571,21 @@ class ComprehensiveExtractor(ast.NodeVisitor):
             "File",
             module=module_name,
             name=self.file_path.name,              # ← ADD FILE NAME
-            path=str(self.file_path),
+            path=self.file_path_str,
             relpath=relpath,
             docstring=file_docstring              # ← ADD FILE DOCSTRING
         )
 
-        self.nodes.append(node)
+        self._emit_node(node)
         self.current_scope_stack.append(self.file_id)
         return self.file_id
     
-    def _is_stdlib(self, module_name: str) -> bool:
-        """Check if module is from standard library"""
-        stdlib_modules = {
-            'abc', 'argparse', 'ast', 'asyncio', 'collections', 'copy',
-            'dataclasses', 'datetime', 'enum', 'functools', 'hashlib',
-            'itertools', 'json', 'logging', 'math', 'os', 'pathlib',
-            'pickle', 're', 'sys', 'time', 'typing', 'unittest'
-        }
-        base_module = module_name.split('.')[0]
-        return base_module in stdlib_modules
-    
     def _safe_unparse(self, node: ast.AST) -> Optional[str]:
         """Safely unparse AST node"""
         try:
+            text = _fast_unparse(node)
+            if text is not None:
+                return text[:200]
             if hasattr(ast, 'unparse'):
                 return ast.unparse(node)[:200]
         except:
@@ -346,13 +594,14 @@ class ComprehensiveExtractor(ast.NodeVisitor):
     
     def _get_full_name(self, node: ast.Attribute) -> str:
         """Get full dotted name from Attribute node"""
-        parts = []
-        while isinstance(node, ast.Attribute):
-            parts.append(node.attr)
+        # Build the name right-to-left as a string, no parts list to reverse
+        name = ""
+        while type(node) is ast.Attribute:
+            name = f".{node.attr}{name}"
             node = node.value
-        if isinstance(node, ast.Name):
-            parts.append(node.id)
-        return ".".join(reversed(parts))
+        if type(node) is ast.Name:
+            return node.id + name
+        return name[1:]
     def _parse_docstring(self, docstring: str) -> Dict[str, Any]:
         """Parse structured docstrings (Google, NumPy, reStructuredText)"""
         if not docstring:
@@ -522,29 +771,29 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         for alias in node.names:
             target = alias.name
             import_alias = alias.asname or alias.name
-            self.imports_map[import_alias] = target
+            self._bind_import(import_alias, target)
             
                         # Check if this is a function-level import
             is_function_level = self.current_function is not None
             scope_id = self.current_function if is_function_level else self.file_id
             
             import_id = stable_id(self.file_id, "import", target, str(node.lineno))
-            self.nodes.append({
+            self._emit_node({
                 "id": import_id,
-                "type": NodeType.IMPORT.value,
+                "type": _NT_IMPORT,
                 "name": target,
                 "alias": alias.asname,
                 "import_type": "direct",
                 "lineno": node.lineno,
-                "is_stdlib": self._is_stdlib(target),
+                "is_stdlib": _is_stdlib(target),
                 "is_relative": False,
                 "level": 0,
                 "is_function_level": is_function_level,
                 "scope": "function" if is_function_level else "module"
             })
             
-            self.edges.append({
-                "type": EdgeType.IMPORTS.value,
+            self._emit_edge({
+                "type": _ET_IMPORTS,
                 "from_id": scope_id,
                 "to_id": import_id,
                 "lineno": node.lineno,
@@ -562,16 +811,16 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         for alias in node.names:
             target = f"{module}.{alias.name}" if module else alias.name
             import_alias = alias.asname or alias.name
-            self.imports_map[import_alias] = target
+            self._bind_import(import_alias, target)
             
                         # Check if this is a function-level import
             is_function_level = self.current_function is not None
             scope_id = self.current_function if is_function_level else self.file_id
             
             import_id = stable_id(self.file_id, "import", target, str(node.lineno))
-            self.nodes.append({
+            self._emit_node({
                 "id": import_id,
-                "type": NodeType.IMPORT.value,
+                "type": _NT_IMPORT,
                 "name": alias.name,
                 "module": module,
                 "full_name": target,
@@ -580,13 +829,13 @@ class ComprehensiveExtractor(ast.NodeVisitor):
                 "level": level,
                 "is_relative": level > 0,
                 "lineno": node.lineno,
-                "is_stdlib": self._is_stdlib(module) if module else False,
+                "is_stdlib": _is_stdlib(module) if module else False,
                 "is_function_level": is_function_level,
                 "scope": "function" if is_function_level else "module"
             })
             
-            self.edges.append({
-                "type": EdgeType.IMPORTS.value,
+            self._emit_edge({
+                "type": _ET_IMPORTS,
                 "from_id": scope_id,
                 "to_id": import_id,
                 "lineno": node.lineno,
@@ -596,8 +845,8 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         
         self.generic_visit(node)
     
-    def _extract_decorators(self, node: ast.FunctionDef) -> List[Dict]:
-        """Extract decorator information with parameters"""
+    def _extract_decorators(self, node: ast.FunctionDef) -> List[Tuple[Dict, Optional[str]]]:
+        """Extract decorator information with parameters, paired with the decorator node id"""
         decorators = []
         for dec in node.decorator_list:
             dec_info = {"name": None, "args": [], "kwargs": {}}
@@ -615,19 +864,20 @@ class ComprehensiveExtractor(ast.NodeVisitor):
             else:
                 dec_info["name"] = self._safe_unparse(dec)
             
-            decorators.append(dec_info)
-            
+            dec_id = None
             if dec_info["name"]:
                 dec_id = stable_id(self.file_id, "decorator", dec_info["name"], str(dec.lineno))
-                self.nodes.append({
+                self._emit_node({
                     "id": dec_id,
-                    "type": NodeType.DECORATOR.value,
+                    "type": _NT_DECORATOR,
                     "name": dec_info["name"],
                     "lineno": dec.lineno,
                     "args": dec_info["args"],
                     "kwargs": dec_info["kwargs"]
                 })
                 self.stats["decorators"] += 1
+            
+            decorators.append((dec_info, dec_id))
         
         return decorators
     
@@ -683,40 +933,31 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         
         return params
     
-    def _compute_metrics(self, node: ast.FunctionDef) -> CodeMetrics:
+    def _compute_metrics(self, node: ast.FunctionDef, has_docstring: bool) -> CodeMetrics:
         """Compute comprehensive code metrics"""
         start_line = node.lineno
-        end_line = getattr(node, "end_lineno", node.lineno)
+        end_line = node.end_lineno
         loc = end_line - start_line + 1
         
-        num_returns = sum(1 for n in ast.walk(node) if isinstance(n, ast.Return))
-        num_branches = sum(1 for n in ast.walk(node) if isinstance(n, (ast.If, ast.IfExp)))
-        num_loops = sum(1 for n in ast.walk(node) if isinstance(n, (ast.For, ast.While)))
-        
-        def calc_depth(n, depth=0):
-            max_d = depth
-            for child in ast.iter_child_nodes(n):
-                if isinstance(child, (ast.For, ast.While, ast.If, ast.With, ast.Try)):
-                    max_d = max(max_d, calc_depth(child, depth + 1))
-            return max_d
+        complexity, num_returns, num_branches, num_loops, max_depth = compute_function_metrics(node)
         
         return CodeMetrics(
             lines_of_code=loc,
-            complexity=calculate_complexity(node),
+            complexity=complexity,
             num_parameters=len(node.args.args),
             num_returns=num_returns,
             num_branches=num_branches,
             num_loops=num_loops,
-            has_docstring=ast.get_docstring(node) is not None,
+            has_docstring=has_docstring,
             num_decorators=len(node.decorator_list),
-            max_nesting_depth=calc_depth(node)
+            max_nesting_depth=max_depth
         )
     
     def _get_source_snippet(self, node: ast.AST, max_lines: int = 10) -> str:
         """Extract source code snippet"""
-        lines = self.src.splitlines()
+        lines = self._lines
         start = max(0, node.lineno - 1)
-        end = min(len(lines), getattr(node, "end_lineno", node.lineno))
+        end = min(len(lines), node.end_lineno)
         snippet_lines = lines[start:end]
         
         if len(snippet_lines) > max_lines:
@@ -725,20 +966,40 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         
         return "\n".join(snippet_lines)
     
+    def _get_source_segment(self, node: ast.AST) -> Optional[str]:
+        """
+        ast.get_source_segment(self.src, node) without re-splitting the whole
+        source on every call (col offsets are UTF-8 byte offsets)
+        """
+        end_lineno = node.end_lineno
+        end_col_offset = node.end_col_offset
+        if end_lineno is None or end_col_offset is None:
+            return None
+        
+        lines = self._segment_lines
+        lineno = node.lineno - 1
+        end_lineno -= 1
+        if end_lineno == lineno:
+            return lines[lineno].encode()[node.col_offset:end_col_offset].decode()
+        
+        first = lines[lineno].encode()[node.col_offset:].decode()
+        last = lines[end_lineno].encode()[:end_col_offset].decode()
+        return first + "".join(lines[lineno + 1:end_lineno]) + last
+    
     def _get_full_source_code(self, node: ast.AST) -> str:
         """Extract complete source code for the function/method"""
         try:
-            # Method 1: Use ast.get_source_segment (Python 3.8+)
-            full_code = ast.get_source_segment(self.src, node, padded=False)
+            # Method 1: Same result as ast.get_source_segment, using the cached lines
+            full_code = self._get_source_segment(node)
             if full_code:
                 return full_code
         except Exception:
             pass
         
         # Method 2: Fallback to line-based extraction
-        lines = self.src.splitlines()
+        lines = self._lines
         start = max(0, node.lineno - 1)
-        end = min(len(lines), getattr(node, "end_lineno", node.lineno))
+        end = min(len(lines), node.end_lineno)
         return "\n".join(lines[start:end])
 
 
@@ -749,25 +1010,26 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         
         fn_id = stable_id(self.file_id, "function", node.name, str(node.lineno))
         
-        decorators = self._extract_decorators(node)
+        decorators_with_ids = self._extract_decorators(node)
+        decorators = [dec_info for dec_info, _ in decorators_with_ids]
         parameters = self._extract_parameters(node.args)
-        metrics = self._compute_metrics(node)
+        doc = _fast_docstring(node.body)
+        metrics = self._compute_metrics(node, doc is not None)
         snippet = self._get_source_snippet(node)
         full_source_code = self._get_full_source_code(node)
-        doc = ast.get_docstring(node)
         parsed_doc = self._parse_docstring(doc) if doc else {}
         return_type = self._safe_unparse(node.returns) if node.returns else None
 
         
-        self.defined_names[node.name] = fn_id
-        node_type = NodeType.METHOD if is_method else NodeType.FUNCTION
+        self._bind_definition(node.name, fn_id)
+        node_type = _NT_METHOD if is_method else _NT_FUNCTION
     
         function_node = {
             "id": fn_id,
-            "type": node_type.value,
+            "type": node_type,
             "name": node.name,
             "qualified_name": f"{self.current_class}.{node.name}" if is_method else node.name,
-            "is_async": isinstance(node, ast.AsyncFunctionDef),
+            "is_async": type(node) is ast.AsyncFunctionDef,
             "is_method": is_method,
             "is_static": any(d["name"] == "staticmethod" for d in decorators),
             "is_class_method": any(d["name"] == "classmethod" for d in decorators),
@@ -779,12 +1041,12 @@ class ComprehensiveExtractor(ast.NodeVisitor):
             "parameters": parameters,
             "return_type": return_type,
             "lineno": node.lineno,
-            "end_lineno": getattr(node, "end_lineno", None),
+            "end_lineno": node.end_lineno,
             "docstring": doc,
             "parsed_docstring": parsed_doc,
             "snippet": snippet[:500] if len(snippet) > 500 else snippet,
             "full_source_code": full_source_code,
-            "metrics": asdict(metrics),
+            "metrics": metrics.to_dict(),
         }
 
         # Add embedding
@@ -799,10 +1061,10 @@ class ComprehensiveExtractor(ast.NodeVisitor):
             snippet=snippet
 )
 
-        self.nodes.append(function_node)
+        self._emit_node(function_node)
 
-        self.edges.append({
-            "type": EdgeType.DEFINES.value,
+        self._emit_edge({
+            "type": _ET_DEFINES,
             "from_id": parent_scope,
             "to_id": fn_id,
             "relationship": "contains_method" if is_method else "contains_function"
@@ -810,9 +1072,9 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         
         for param in parameters:
             param_id = stable_id(fn_id, "param", param["name"])
-            self.nodes.append({
+            self._emit_node({
                 "id": param_id,
-                "type": NodeType.PARAMETER.value,
+                "type": _NT_PARAMETER,
                 "name": param["name"],
                 "param_type": param["type"],
                 "kind": param["kind"],
@@ -820,18 +1082,17 @@ class ComprehensiveExtractor(ast.NodeVisitor):
                 "position": param["position"]
             })
             
-            self.edges.append({
-                "type": EdgeType.HAS_PARAMETER.value,
+            self._emit_edge({
+                "type": _ET_HAS_PARAMETER,
                 "from_id": fn_id,
                 "to_id": param_id,
                 "position": param["position"]
             })
         
-        for dec in decorators:
-            if dec["name"]:
-                dec_id = stable_id(self.file_id, "decorator", dec["name"], str(node.lineno))
-                self.edges.append({
-                    "type": EdgeType.DECORATES.value,
+        for _, dec_id in decorators_with_ids:
+            if dec_id:
+                self._emit_edge({
+                    "type": _ET_DECORATES,
                     "from_id": dec_id,
                     "to_id": fn_id,
                     "lineno": node.lineno
@@ -863,13 +1124,13 @@ class ComprehensiveExtractor(ast.NodeVisitor):
     def visit_ClassDef(self, node: ast.ClassDef):
         """Visit class definition"""
         parent_scope = self._get_current_scope()
-        class_id = stable_id(self.file_path, "class", node.name, str(node.lineno))
+        class_id = stable_id(self.file_path_str, "class", node.name, str(node.lineno))
         
         snippet = self._get_source_snippet(node)
         full_source_code = self._get_full_source_code(node)
-        doc = ast.get_docstring(node)
+        doc = _fast_docstring(node.body)
         parsed_doc = self._parse_docstring(doc) if doc else {}
-        bases = [self._safe_unparse(b) for b in node.bases if self._safe_unparse(b)]
+        bases = [base for base in map(self._safe_unparse, node.bases) if base]
         decorators = []
         for dec in node.decorator_list:
             if isinstance(dec, ast.Name):
@@ -879,25 +1140,30 @@ class ComprehensiveExtractor(ast.NodeVisitor):
                 if dec_name:
                     decorators.append(dec_name)
         
-        methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
-        class_vars = [n for n in node.body if isinstance(n, ast.Assign)]
+        num_methods = num_class_vars = 0
+        for stmt in node.body:
+            stmt_type = type(stmt)
+            if stmt_type in _FUNCTION_TYPES:
+                num_methods += 1
+            elif stmt_type is ast.Assign:
+                num_class_vars += 1
         
-        self.defined_names[node.name] = class_id
+        self._bind_definition(node.name, class_id)
         
         class_node = {
             "id": class_id,
-            "type": NodeType.CLASS.value,
+            "type": _NT_CLASS,
             "name": node.name,
             "lineno": node.lineno,
-            "end_lineno": getattr(node, "end_lineno", None),
+            "end_lineno": node.end_lineno,
             "docstring": doc,
             "parsed_docstring": parsed_doc,
             "snippet": snippet[:500] if len(snippet) > 500 else snippet,
             "full_source_code": full_source_code,
             "bases": bases,
             "decorators": decorators,
-            "num_methods": len(methods),
-            "num_class_vars": len(class_vars),
+            "num_methods": num_methods,
+            "num_class_vars": num_class_vars,
             "is_private": node.name.startswith('_'),
             "is_abstract": 'ABC' in bases or 'abc.ABC' in bases,
         }
@@ -912,27 +1178,28 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         )
 
 
-        self.nodes.append(class_node)
+        self._emit_node(class_node)
 
         
-        self.edges.append({
-            "type": EdgeType.DEFINES.value,
+        self._emit_edge({
+            "type": _ET_DEFINES,
             "from_id": parent_scope,
             "to_id": class_id,
             "relationship": "contains_class"
         })
         
         for base in bases:
-            if base in self.defined_names:
-                self.edges.append({
-                    "type": EdgeType.INHERITS.value,
+            base_id = self._names_get(base, _UNBOUND)[1]
+            if base_id is not None:
+                self._emit_edge({
+                    "type": _ET_INHERITS,
                     "from_id": class_id,
-                    "to_id": self.defined_names[base],
+                    "to_id": base_id,
                     "base_name": base
                 })
             else:
-                self.edges.append({
-                    "type": EdgeType.INHERITS.value,
+                self._emit_edge({
+                    "type": _ET_INHERITS,
                     "from_id": class_id,
                     "to_name": base,
                     "inferred": True
@@ -969,9 +1236,9 @@ class ComprehensiveExtractor(ast.NodeVisitor):
                     value_str = self._safe_unparse(node.value)
                     value_type = "complex"
                 
-                self.nodes.append({
+                self._emit_node({
                     "id": var_id,
-                    "type": NodeType.VARIABLE.value,
+                    "type": _NT_VARIABLE,
                     "name": var_name,
                     "value": value_str,
                     "value_type": value_type,
@@ -982,15 +1249,15 @@ class ComprehensiveExtractor(ast.NodeVisitor):
                     "scope": "global" if is_global else "local"
                 })
                 
-                self.edges.append({
-                    "type": EdgeType.DEFINES.value,
+                self._emit_edge({
+                    "type": _ET_DEFINES,
                     "from_id": scope,
                     "to_id": var_id,
                     "relationship": "defines_variable"
                 })
                 
                 self.scope_vars[scope].add(var_name)
-                self.defined_names[var_name] = var_id
+                self._bind_definition(var_name, var_id)
                 self.stats["variables"] += 1
         
         self.generic_visit(node)
@@ -998,30 +1265,32 @@ class ComprehensiveExtractor(ast.NodeVisitor):
     def visit_Call(self, node: ast.Call):
         """Visit function calls"""
         callee = None
-        if isinstance(node.func, ast.Name):
-            callee = node.func.id
-        elif isinstance(node.func, ast.Attribute):
-            callee = self._get_full_name(node.func)
+        func = node.func
+        func_type = type(func)
+        if func_type is ast.Name:
+            callee = func.id
+        elif func_type is ast.Attribute:
+            callee = self._get_full_name(func)
         
         caller = self._get_current_scope()
         
         if callee and caller:
-            resolved_name = callee
-            first_part = callee.split('.')[0]
+            first_part, sep, rest = callee.partition('.')
             
-            if first_part in self.imports_map:
-                resolved_name = self.imports_map[first_part]
-                if '.' in callee:
-                    resolved_name += callee[len(first_part):]
+            imported, target_id = self._names_get(first_part, _UNBOUND)
             
-            target_id = self.defined_names.get(first_part)
+            resolved_name = None
+            if imported is not None:
+                resolved_name = imported + sep + rest
+                if resolved_name == callee:
+                    resolved_name = None
             
             call_edge = {
-                "type": EdgeType.CALLS.value,
+                "type": _ET_CALLS,
                 "from_id": caller,
                 "to_name": callee,
                 "lineno": node.lineno,
-                "resolved_name": resolved_name if resolved_name != callee else None,
+                "resolved_name": resolved_name,
                 "num_args": len(node.args),
                 "num_kwargs": len(node.keywords),
                 "inferred": target_id is None
@@ -1030,7 +1299,7 @@ class ComprehensiveExtractor(ast.NodeVisitor):
             if target_id:
                 call_edge["to_id"] = target_id
             
-            self.edges.append(call_edge)
+            self._emit_edge(call_edge)
             self.stats["calls"] += 1
         
         self.generic_visit(node)
@@ -1040,8 +1309,8 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         if node.exc and self.current_function:
             exc_type = self._safe_unparse(node.exc)
             if exc_type:
-                self.edges.append({
-                    "type": EdgeType.RAISES.value,
+                self._emit_edge({
+                    "type": _ET_RAISES,
                     "from_id": self.current_function,
                     "to_name": exc_type,
                     "lineno": node.lineno
@@ -1053,8 +1322,8 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         if node.value and self.current_function:
             return_expr = self._safe_unparse(node.value)
             if return_expr:
-                self.edges.append({
-                    "type": EdgeType.RETURNS.value,
+                self._emit_edge({
+                    "type": _ET_RETURNS,
                     "from_id": self.current_function,
                     "to_name": return_expr,
                     "lineno": node.lineno
@@ -1062,34 +1331,194 @@ class ComprehensiveExtractor(ast.NodeVisitor):
         self.generic_visit(node)
 
 
-def extract_file(repo_root: Path, file_path: Path) -> Tuple[List[Dict], List[Dict], Dict]:
-    """Extract nodes and edges from a Python file"""
+# Directory (under the output directory) holding per-file extraction results
+EXTRACTION_CACHE_DIRNAME = ".kg_cache"
+
+
+@lru_cache(maxsize=None)
+def _extractor_fingerprint() -> str:
+    """Hash of this module and the Python version, so extractor changes invalidate the cache"""
+    return sha1_hex(f"{sys.version_info[:2]}::{Path(__file__).read_text(encoding='utf-8')}")
+
+
+def _extraction_cache_path(cache_dir: Path, file_path: Path, src: str) -> Path:
+    """Cache entry for this exact file path + content (ids depend on both)"""
+    key = sha1_hex(f"{_extractor_fingerprint()}::{file_path}::{sha1_hex(src)}")
+    return cache_dir / f"{key}.json"
+
+
+def _load_cached_extraction(cache_path: Path) -> Optional[Tuple[bytes, bytes, Dict]]:
+    """
+    Read a cached (nodes JSONL, edges JSONL, stats) result; None if missing or unreadable.
+    Layout: one JSON header line with the stats and blob sizes, then both blobs.
+    """
     try:
-        src = file_path.read_text(encoding='utf-8')
+        data = cache_path.read_bytes()
+        header_end = data.index(b"\n") + 1
+        header = json.loads(data[:header_end])
+        split = header_end + header["nodes_size"]
+        if len(data) != split + header["edges_size"]:
+            return None
+        return data[header_end:split], data[split:], header["stats"]
+    except Exception:
+        return None
+
+
+def _store_cached_extraction(cache_path: Path, nodes: bytes, edges: bytes, stats: Dict):
+    """Write a cache entry atomically; failures only cost a re-parse next run"""
+    header = {"stats": stats, "nodes_size": len(nodes), "edges_size": len(edges)}
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        data = b"".join((json.dumps(header).encode("utf-8"), b"\n", nodes, edges))
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        pass
+
+
+def _read_source(file_path: Path) -> Optional[str]:
+    """Read a Python file; None (after reporting) if it can't be read"""
+    try:
+        return file_path.read_text(encoding='utf-8')
     except Exception as e:
         print(f"[ERROR] Could not read {file_path}: {e}")
-        return [], [], {}
-    
+        return None
+
+
+def _parse_source(file_path: Path, src: str) -> Optional[ast.AST]:
+    """Parse Python source; None (after reporting) on syntax/parse errors"""
     try:
-        tree = ast.parse(src)
+        # No feature_version pin: it would reject files using newer syntax than the pin
+        return ast.parse(src, filename=str(file_path), type_comments=False)
     except SyntaxError as e:
         print(f"[ERROR] SyntaxError in {file_path} at line {e.lineno}: {e.msg}")
-        return [], [], {}
     except Exception as e:
         print(f"[ERROR] Parse error in {file_path}: {e}")
-        return [], [], {}
-    
-    extractor = ComprehensiveExtractor(repo_root, file_path, src, tree)
+    return None
+
+
+def _run_extractor(extractor: "ComprehensiveExtractor", tree: ast.AST) -> bool:
+    """Emit the file node and walk the tree; False if extraction stopped partway"""
     extractor.record_file_node()
     
     try:
         extractor.visit(tree)
     except Exception as e:
-        print(f"[ERROR] Extraction error in {file_path}: {e}")
+        print(f"[ERROR] Extraction error in {extractor.file_path}: {e}")
+        return False
+    return True
+
+
+def extract_file(repo_root: Path, file_path: Path) -> Tuple[List[Dict], List[Dict], Dict]:
+    """Extract nodes and edges from a Python file"""
+    src = _read_source(file_path)
+    if src is None:
+        return [], [], {}
     
+    tree = _parse_source(file_path, src)
+    if tree is None:
+        return [], [], {}
+    
+    extractor = ComprehensiveExtractor(repo_root, file_path, src, tree)
+    _run_extractor(extractor, tree)
     return extractor.nodes, extractor.edges, extractor.stats
 
 
+def extract_file_jsonl(repo_root: Path, file_path: Path,
+                       cache_dir: Optional[Path] = None) -> Tuple[bytes, bytes, Dict]:
+    """
+    Extract a Python file straight to JSONL bytes (nodes, edges) plus stats.
+    Each record is serialized as soon as it is emitted, so no per-file lists of
+    dicts are kept, and unchanged files are served from cache_dir without parsing.
+    """
+    src = _read_source(file_path)
+    if src is None:
+        return b"", b"", {}
+    
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = _extraction_cache_path(cache_dir, file_path, src)
+        cached = _load_cached_extraction(cache_path)
+        if cached is not None:
+            return cached
+    
+    tree = _parse_source(file_path, src)
+    if tree is None:
+        return b"", b"", {}
+    
+    node_lines: List[bytes] = []
+    edge_lines: List[bytes] = []
+    extractor = ComprehensiveExtractor(
+        repo_root, file_path, src, tree,
+        emit_node=lambda item: node_lines.append(encode_jsonl_line(storable_record(item))),
+        emit_edge=lambda item: edge_lines.append(encode_jsonl_line(storable_record(item))),
+    )
+    completed = _run_extractor(extractor, tree)
+    nodes = b"".join(node_lines)
+    edges = b"".join(edge_lines)
+    
+    # Partial results aren't cached, so the error is reported again next run
+    if completed and cache_path is not None:
+        _store_cached_extraction(cache_path, nodes, edges, extractor.stats)
+    
+    return nodes, edges, extractor.stats
+
+
+def extract_files(repo_root: Path, py_files: List[Path], workers: Optional[int] = None,
+                  cache_dir: Optional[Path] = None):
+    """
+    Extract all files across a process pool (AST work is CPU-bound, so threads don't help).
+    Yields (nodes JSONL, edges JSONL, stats) per file in the same order as py_files;
+    serializing in the workers also keeps the results cheap to send back.
+    """
+    # No point starting more processes than there are files
+    workers = min(workers or os.cpu_count() or 1, len(py_files))
+    if workers <= 1:
+        for file_path in py_files:
+            yield extract_file_jsonl(repo_root, file_path, cache_dir)
+        return
+    
+    # ~4 chunks per worker: enough to balance uneven file sizes, few enough to keep IPC cheap
+    chunksize = max(1, len(py_files) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(partial(extract_file_jsonl, repo_root, cache_dir=cache_dir),
+                                py_files, chunksize=chunksize)
+
+
+def _walk_python_tree(root: Path, exclude: List[str]):
+    """
+    Top-down walk yielding (dirpath, subdir names, .py file names) like os.walk,
+    with hidden/excluded directories pruned and non-Python files dropped.
+    Uses os.scandir directly so the DirEntry type cache answers is_dir()
+    without an extra stat per entry.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        dirpath = stack.pop()
+        subdirs = []
+        py_files = []
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if name not in exclude and not name.startswith('.'):
+                            subdirs.append(entry)
+                    elif name.endswith('.py') and not name.startswith('.'):
+                        py_files.append(name)
+        except OSError:
+            continue
+        
+        yield dirpath, [entry.name for entry in subdirs], py_files
+        # Same as os.walk(followlinks=False): list symlinked dirs, don't descend
+        stack.extend(reversed([entry.path for entry in subdirs if not entry.is_symlink()]))
+
+
 def build_directory_tree(root: Path, exclude: Optional[List[str]] = None) -> Tuple[Dict[Path, str], List[Dict], List[Dict]]:
     """Build directory tree structure"""
     if exclude is None:
@@ -1105,14 +1534,14 @@ def build_directory_tree(root: Path, exclude: Optional[List[str]] = None) -> Tup
     
     nodes.append({
         "id": repo_id,
-        "type": NodeType.REPOSITORY.value,
+        "type": _NT_REPOSITORY,
         "name": root.name,
         "path": str(root),
     })
     
-    for dirpath, dirnames, filenames in os.walk(root):
+    for dirpath, dirnames, filenames in _walk_python_tree(root, exclude):
         current_path = Path(dirpath)
-        dirnames[:] = [d for d in dirnames if d not in exclude and not d.startswith('.')]
+        current_label = _NT_REPOSITORY if current_path == root else _NT_DIRECTORY
         
         current_id = dir_to_id.get(current_path)
         if not current_id:
@@ -1121,7 +1550,7 @@ def build_directory_tree(root: Path, exclude: Optional[List[str]] = None) -> Tup
             
             nodes.append({
                 "id": current_id,
-                "type": NodeType.DIRECTORY.value,
+                "type": _NT_DIRECTORY,
                 "name": current_path.name,
                 "path": str(current_path),
                 "relpath": str(current_path.relative_to(root))
@@ -1130,10 +1559,12 @@ def build_directory_tree(root: Path, exclude: Optional[List[str]] = None) -> Tup
             parent_path = current_path.parent
             if parent_path in dir_to_id:
                 edges.append({
-                    "type": EdgeType.CONTAINS.value,
+                    "type": _ET_CONTAINS,
                     "from_id": dir_to_id[parent_path],
                     "to_id": current_id,
-                    "relationship": "contains_directory"
+                    "relationship": "contains_directory",
+                    "from_label": _NT_REPOSITORY if parent_path == root else _NT_DIRECTORY,
+                    "to_label": _NT_DIRECTORY
                 })
         
         for dirname in dirnames:
@@ -1143,30 +1574,33 @@ def build_directory_tree(root: Path, exclude: Optional[List[str]] = None) -> Tup
             
             nodes.append({
                 "id": dir_id,
-                "type": NodeType.DIRECTORY.value,
+                "type": _NT_DIRECTORY,
                 "name": dirname,
                 "path": str(dir_path),
                 "relpath": str(dir_path.relative_to(root))
             })
             
             edges.append({
-                "type": EdgeType.CONTAINS.value,
+                "type": _ET_CONTAINS,
                 "from_id": current_id,
                 "to_id": dir_id,
-                "relationship": "contains_directory"
+                "relationship": "contains_directory",
+                "from_label": current_label,
+                "to_label": _NT_DIRECTORY
             })
         
         for filename in filenames:
-            if filename.endswith('.py') and not filename.startswith('.'):
-                file_path = current_path / filename
-                file_id = stable_id(str(file_path))
-                
-                edges.append({
-                    "type": EdgeType.CONTAINS.value,
-                    "from_id": current_id,
-                    "to_id": file_id,
-                    "relationship": "contains_file"
-                })
+            file_path = current_path / filename
+            file_id = stable_id(str(file_path))
+            
+            edges.append({
+                "type": _ET_CONTAINS,
+                "from_id": current_id,
+                "to_id": file_id,
+                "relationship": "contains_file",
+                "from_label": current_label,
+                "to_label": _NT_FILE
+            })
     
     return dir_to_id, nodes, edges
 
@@ -1177,28 +1611,336 @@ def find_python_files(root: Path, exclude: Optional[List[str]] = None) -> List[P
         exclude = [".git", "__pycache__", "node_modules", ".venv", "venv"]
     
     py_files = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in exclude and not d.startswith('.')]
-        for filename in filenames:
-            if filename.endswith('.py') and not filename.startswith('.'):
-                py_files.append(Path(dirpath) / filename)
+    for dirpath, _, filenames in _walk_python_tree(root, exclude):
+        py_files.extend(Path(dirpath, filename) for filename in filenames)
     
     return py_files
 
 
+# Write buffer for the JSONL outputs (held open for the whole analysis)
+JSONL_WRITE_BUFFER = 1 << 20
+
+# Buffer size for reading JSONL back in the loader
+JSONL_READ_BUFFER = 1 << 20
+
+if ORJSON_AVAILABLE:
+    _ORJSON_JSONL_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
+
+def encode_jsonl_line(item: Dict) -> bytes:
+    """Serialize one record as a UTF-8 JSONL line (trailing newline included)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(item, option=_ORJSON_JSONL_OPTIONS)
+    return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def json_property(value: Any) -> str:
+    """Encode a list/dict value as a JSON string property (Neo4j has no map/nested-list properties)"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value).decode("utf-8")
+        except TypeError:
+            # e.g. integers wider than 64 bits
+            pass
+    return json.dumps(value)
+
+
+def storable_record(item: Dict) -> Dict:
+    """
+    Encode a record's list/dict values as JSON strings in place, so the loader
+    can store it as-is (see "properties_encoded" in stats.json)
+    """
+    for key, value in item.items():
+        if isinstance(value, (list, dict)):
+            item[key] = json_property(value)
+    return item
+
+
+def open_jsonl(path: Path):
+    """Open a JSONL file for appending, with a large buffer so many small writes become few syscalls"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.open("ab", buffering=JSONL_WRITE_BUFFER)
+
+
+def write_jsonl_items(f, items: List[Dict]):
+    """Serialize items and append them to an open binary JSONL handle in one write"""
+    f.write(b"".join(map(encode_jsonl_line, items)))
+
+
 def write_jsonl(path: Path, items: List[Dict]):
     """Write items to JSONL file"""
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        for item in items:
-            json.dump(item, f, ensure_ascii=False)
-            f.write('\n')
+    with open_jsonl(path) as f:
+        write_jsonl_items(f, items)
+
+
+def iter_jsonl(filepath: Path) -> Iterator[Dict]:
+    """Stream records from a JSONL file without materializing the whole file"""
+    print(f"📂 Streaming {filepath.name}...")
+    # Both parsers take the raw bytes, so lines are never decoded to str first
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    with open(filepath, 'rb', buffering=JSONL_READ_BUFFER) as f:
+        for line in f:
+            if not line.isspace():
+                yield loads(line)
 
 
 # ============================================================================
 # NEO4J LOADER
 # ============================================================================
 
+# Rows per UNWIND statement, and statements committed together in one explicit transaction
+NEO4J_BATCH_SIZE = 1000
+NEO4J_BATCHES_PER_TX = 20
+
+# Loader connections; labels/relationship types are written concurrently,
+# one session per in-flight write, leaving a couple of connections spare
+NEO4J_MAX_CONNECTION_POOL_SIZE = 50
+NEO4J_LOAD_WORKERS = NEO4J_MAX_CONNECTION_POOL_SIZE - 2
+
+# Relationship writers lock both endpoints, and many edges share the same
+# File/Class nodes, so only a few edge buffers are written at once
+NEO4J_EDGE_LOAD_WORKERS = 4
+
+# Retries for transient failures (e.g. deadlocks between concurrent relationship writers)
+NEO4J_TRANSIENT_RETRIES = 3
+
+# Nodes deleted per server-side transaction when clearing the database
+NEO4J_DELETE_ROWS_PER_TX = 10000
+
+# Upper bound on waiting for constraints/indexes to come online after bulk creation
+NEO4J_INDEX_AWAIT_SECONDS = 600
+
+
+def _is_memory_pool_error(error: Exception) -> bool:
+    """Transaction ran out of server memory (retry with smaller batches)"""
+    return "MemoryPoolOutOfMemoryError" in (getattr(error, "code", None) or "")
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Server says the transaction may succeed if retried (deadlock, lock timeout, ...)"""
+    return (getattr(error, "code", None) or "").startswith("Neo.TransientError")
+
+
+def _summary_count(summary, counter: Optional[str], rows: List[Dict]) -> int:
+    """
+    Summary counter of a write (e.g. "nodes_created"), or the number of rows
+    written when counter is None (a MERGE onto existing nodes creates nothing)
+    """
+    return len(rows) if counter is None else getattr(summary.counters, counter)
+
+
+# Node labels the loader writes (other record types are ignored)
+NODE_TYPE_ORDER = [
+    'Repository', 'Directory', 'File', 'Module',
+    'Class', 'Function', 'Method', 
+    'Variable', 'Parameter', 'Decorator', 'Import'
+]
+_NODE_TYPES = frozenset(NODE_TYPE_ORDER)
+
+
+def _node_rows(nodes: Iterable[Dict], encoded: bool = False) -> Iterator[Tuple[str, Dict]]:
+    """
+    (label, property map) per node; None values dropped, lists/dicts stored as JSON.
+    The records are consumed, so they are cleaned in place rather than copied.
+    Records written with storable_record (encoded) are passed through; their
+    None values are left for SET, which skips nulls.
+    Valid code can produce the same id twice (e.g. `x = 1; x = 2` or
+    `import os, os`); only the first record per (label, id) is kept, so the
+    uniqueness constraints can be built over the loaded nodes.
+    """
+    seen: Set[Tuple[str, str]] = set()
+    for node in nodes:
+        node_type = node.pop('type')
+        if node_type not in _NODE_TYPES:
+            continue
+        key = (node_type, node.get('id'))
+        if key in seen:
+            continue
+        seen.add(key)
+        if encoded:
+            yield node_type, node
+            continue
+        
+        # Most values are already storable; only touch the ones that aren't
+        fix = [key for key, value in node.items() if value is None or isinstance(value, (list, dict))]
+        for key in fix:
+            value = node[key]
+            if value is None:
+                del node[key]
+            else:
+                node[key] = json_property(value)
+        yield node_type, node
+
+
+def _tag_node_rows(rows: Iterable[Tuple[str, Dict]], load_run: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Stamp each row with the load run and its repository's id, so a reload can
+    find the nodes it did not write. The Repository record is emitted first.
+    """
+    repository_id = None
+    for node_type, row in rows:
+        if node_type == _NT_REPOSITORY:
+            repository_id = row['id']
+        row['load_run'] = load_run
+        row['repository_id'] = repository_id
+        yield node_type, row
+
+
+# Edge keys that describe the endpoints rather than the relationship
+_EDGE_ENDPOINT_KEYS = frozenset({'type', 'from', 'to', 'from_id', 'to_id', 'to_name', 'from_label', 'to_label'})
+
+
+def _edge_rows(edges: Iterable[Dict], skipped_by_type: Dict[str, int],
+               encoded: bool = False) -> Iterator[Tuple[Tuple, Dict]]:
+    """
+    ((type, from label, to label), {from, to, properties}) per resolvable edge;
+    unresolved (external) ones are counted. Labels are None when unknown
+    (e.g. JSONL written before edges carried them). Property values of
+    encoded records (see _node_rows) are passed through.
+    """
+    for edge in edges:
+        if not ('to_id' in edge or 'to' in edge):
+            skipped_by_type[edge['type']] += 1
+            continue
+        
+        normalized = {}
+        
+        if 'from_id' in edge:
+            normalized['from'] = edge['from_id']
+        elif 'from' in edge:
+            normalized['from'] = edge['from']
+        
+        if 'to_id' in edge:
+            normalized['to'] = edge['to_id']
+        elif 'to' in edge:
+            normalized['to'] = edge['to']
+        
+        if encoded:
+            props = {key: value for key, value in edge.items() if key not in _EDGE_ENDPOINT_KEYS}
+        else:
+            props = {}
+            for key, value in edge.items():
+                if key not in _EDGE_ENDPOINT_KEYS:
+                    if value is not None:
+                        if isinstance(value, (list, dict)):
+                            props[key] = json_property(value)
+                        else:
+                            props[key] = value
+        
+        normalized['properties'] = props
+        
+        # Only known labels are interpolated into the query
+        from_label = edge.get('from_label')
+        to_label = edge.get('to_label')
+        if from_label not in _NODE_TYPES:
+            from_label = None
+        if to_label not in _NODE_TYPES:
+            to_label = None
+        yield (edge['type'], from_label, to_label), normalized
+
+
+# Columnar payloads: a batch is sent as one key list plus a value list per row,
+# instead of a map per row repeating every key. Rebuilding the maps server-side
+# needs APOC; without it the loader sends maps.
+_NODE_UNWIND_MAPS = "UNWIND $batch AS nodeData"
+_NODE_UNWIND_COLUMNS = "UNWIND $rows AS values WITH apoc.map.fromLists($keys, values) AS nodeData"
+_EDGE_UNWIND_MAPS = "UNWIND $batch AS edge"
+_EDGE_UNWIND_COLUMNS = (
+    "UNWIND $rows AS values "
+    "WITH {from: values[0], to: values[1], properties: apoc.map.fromLists($keys, values[2..])} AS edge"
+)
+
+
+def _node_batch_params(rows: List[Dict], columnar: bool = False) -> Dict[str, Any]:
+    """Query parameters for a batch of node rows"""
+    if not columnar:
+        return {"batch": rows}
+    # Missing keys become nulls, which SET n = map skips
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    return {"keys": keys, "rows": [[row.get(key) for key in keys] for row in rows]}
+
+
+def _edge_batch_params(rows: List[Dict], columnar: bool = False) -> Dict[str, Any]:
+    """Query parameters for a batch of edge rows (endpoints first, then properties)"""
+    if not columnar:
+        return {"batch": rows}
+    keys = list(dict.fromkeys(key for row in rows for key in row['properties']))
+    return {
+        "keys": keys,
+        "rows": [
+            [row['from'], row['to'], *[row['properties'].get(key) for key in keys]]
+            for row in rows
+        ],
+    }
+
+
+def _node_insert_query(node_type: str, columnar: bool = False) -> str:
+    """UNWIND query creating nodes of one label"""
+    return f"""
+    {_NODE_UNWIND_COLUMNS if columnar else _NODE_UNWIND_MAPS} 
+    CREATE (n:{node_type}) 
+    SET n = nodeData
+    """
+
+
+# Properties written by embeddings.py, kept on reload while the embedded text is unchanged
+_EMBEDDING_PROJECTION = (
+    "n {.embedding_semantics, .embedding_scale, .embedded_text, .embedding_status, .embedding_timestamp}"
+)
+
+
+def _node_merge_query(node_type: str, columnar: bool = False) -> str:
+    """
+    UNWIND query upserting nodes of one label by id, for reloads. The node's
+    outgoing relationships are dropped so the edge load recreates them exactly.
+    A node whose text is the one already embedded keeps its vector and status.
+    """
+    return f"""
+    {_NODE_UNWIND_COLUMNS if columnar else _NODE_UNWIND_MAPS} 
+    MERGE (n:{node_type} {{id: nodeData.id}}) 
+    WITH n, nodeData, {_EMBEDDING_PROJECTION} AS embedding, 
+         n.embedding_status = 'embedded' AND n.embedded_text = nodeData.embedding_semantics AS unchanged 
+    SET n = nodeData 
+    SET n += CASE WHEN unchanged THEN embedding ELSE {{}} END 
+    WITH n 
+    OPTIONAL MATCH (n)-[r]->() 
+    DELETE r
+    """
+
+
+def _node_insert_in_transactions_query(node_type: str, rows_per_tx: int, columnar: bool = False) -> str:
+    """
+    Node insert whose CREATEs are committed server-side every rows_per_tx rows,
+    so one call can carry a large buffer without holding it in a single transaction
+    """
+    return f"""
+    {_NODE_UNWIND_COLUMNS if columnar else _NODE_UNWIND_MAPS} 
+    CALL {{ 
+        WITH nodeData 
+        CREATE (n:{node_type}) 
+        SET n = nodeData 
+    }} IN TRANSACTIONS OF {rows_per_tx} ROWS
+    """
+
+
+def _edge_insert_query(edge_key: Tuple[str, Optional[str], Optional[str]], columnar: bool = False) -> str:
+    """
+    UNWIND query creating relationships of one type between existing nodes.
+    With endpoint labels the MATCHes are seeks on the per-label id constraints;
+    without one the lookup has to scan every node.
+    """
+    edge_type, from_label, to_label = edge_key
+    from_pattern = f"from:{from_label}" if from_label else "from"
+    to_pattern = f"to:{to_label}" if to_label else "to"
+    return f"""
+    {_EDGE_UNWIND_COLUMNS if columnar else _EDGE_UNWIND_MAPS} 
+    MATCH ({from_pattern} {{id: edge.from}}) 
+    MATCH ({to_pattern} {{id: edge.to}}) 
+    CREATE (from)-[r:{edge_type}]->(to) 
+    SET r = edge.properties
+    """
+
+
 class Neo4jRepositoryLoader:
     """Loads hierarchical Python repository structure into Neo4j"""
     
@@ -1207,81 +1949,154 @@ class Neo4jRepositoryLoader:
             raise ImportError("Neo4j driver not installed. Run: pip install neo4j")
         
         print(f"🔐 Connecting to Neo4j...")
+        # Stamped on every node written, so a reload can delete the ones it did not write
+        self.load_run = uuid.uuid4().hex
+        # Bulk writes open an async driver with the same settings (see _write_stream)
+        self.uri = uri
+        self.driver_config = dict(
+            auth=(username, password),
+            max_connection_lifetime=3600,
+            max_connection_pool_size=NEO4J_MAX_CONNECTION_POOL_SIZE,
+            connection_acquisition_timeout=60
+        )
         try:
-            self.driver = GraphDatabase.driver(
-                uri, 
-                auth=(username, password),
-                max_connection_lifetime=3600,
-                max_connection_pool_size=50,
-                connection_acquisition_timeout=60
-            )
-            with self.driver.session() as session:
-                session.run("RETURN 1")
+            self.driver = GraphDatabase.driver(uri, **self.driver_config)
+            # One session for all sequential statements; concurrent writers open their own
+            self.session = self.driver.session()
+            self.session.run("RETURN 1").consume()
             print(f"✅ Connected to Neo4j!")
         except Exception as e:
             print(f"❌ Connection failed: {e}")
             raise
+        
+        self.columnar = self._supports_columnar_batches()
+        if not self.columnar:
+            print("ℹ️  APOC not available, sending batches as maps")
+    
+    def _supports_columnar_batches(self) -> bool:
+        """Columnar batches are rebuilt into maps with apoc.map.fromLists"""
+        try:
+            self.session.run("RETURN apoc.map.fromLists(['a'], [1]) AS m").consume()
+            return True
+        except Exception:
+            return False
     
     def close(self):
+        self.session.close()
         self.driver.close()
     
     def check_existing_data(self) -> int:
         """Check if database has existing data"""
-        with self.driver.session() as session:
-            result = session.run("MATCH (n) RETURN count(n) as count")
-            return result.single()["count"]
+        result = self.session.run("MATCH (n) RETURN count(n) as count")
+        return result.single()["count"]
     
     def clear_database(self):
         """Clear all data from database"""
         print("🗑️  Clearing existing data...")
-        with self.driver.session() as session:
-            while True:
-                result = session.run(
-                    "MATCH (n) WITH n LIMIT 10000 DETACH DELETE n RETURN count(*) as deleted"
-                )
-                deleted = result.single()["deleted"]
-                if deleted == 0:
-                    break
-                print(f"   Deleted {deleted} nodes...")
+        # One statement; the server commits every NEO4J_DELETE_ROWS_PER_TX nodes
+        # instead of the client re-matching from scratch for each chunk
+        summary = self.session.run(
+            f"MATCH (n) CALL {{ WITH n DETACH DELETE n }} "
+            f"IN TRANSACTIONS OF {NEO4J_DELETE_ROWS_PER_TX} ROWS"
+        ).consume()
+        print(f"   Deleted {summary.counters.nodes_deleted} nodes")
         print("✅ Database cleared")
     
-    def create_constraints_and_indexes(self):
-        """Create constraints and indexes"""
-        print("🔧 Creating constraints and indexes...")
-        with self.driver.session() as session:
-            constraints = [
-                "CREATE CONSTRAINT repo_id IF NOT EXISTS FOR (n:Repository) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT dir_id IF NOT EXISTS FOR (n:Directory) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT file_id IF NOT EXISTS FOR (n:File) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT class_id IF NOT EXISTS FOR (n:Class) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT func_id IF NOT EXISTS FOR (n:Function) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT method_id IF NOT EXISTS FOR (n:Method) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT var_id IF NOT EXISTS FOR (n:Variable) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT param_id IF NOT EXISTS FOR (n:Parameter) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT import_id IF NOT EXISTS FOR (n:Import) REQUIRE n.id IS UNIQUE",
-                "CREATE CONSTRAINT decorator_id IF NOT EXISTS FOR (n:Decorator) REQUIRE n.id IS UNIQUE",
-            ]
-            
-            for query in constraints:
-                try:
-                    session.run(query)
-                except Exception:
-                    pass
-            
-            indexes = [
-                "CREATE INDEX file_name IF NOT EXISTS FOR (n:File) ON (n.name)",
-                "CREATE INDEX class_name IF NOT EXISTS FOR (n:Class) ON (n.name)",
-            ]
-            
-            for query in indexes:
+    def delete_stale_nodes(self) -> int:
+        """
+        Delete nodes of the repositories written by this run that the run did
+        not write (e.g. removed files, functions or classes)
+        """
+        print("🧹 Removing stale nodes...")
+        deleted = 0
+        for node_type in NODE_TYPE_ORDER:
+            summary = self.session.run(
+                f"MATCH (r:Repository {{load_run: $run}}) "
+                f"MATCH (n:{node_type} {{repository_id: r.id}}) WHERE n.load_run <> $run "
+                f"CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF {NEO4J_DELETE_ROWS_PER_TX} ROWS",
+                run=self.load_run,
+            ).consume()
+            deleted += summary.counters.nodes_deleted
+        print(f"   Deleted {deleted} nodes")
+        return deleted
+    
+    def _existing_schema_names(self) -> Set[str]:
+        """Names of all constraints and indexes already in the database"""
+        names = {record["name"] for record in self.session.run("SHOW CONSTRAINTS YIELD name")}
+        names.update(record["name"] for record in self.session.run("SHOW INDEXES YIELD name"))
+        return names
+
+    def _run_schema_statements(self, statements: Dict[str, str]):
+        """
+        Run the schema statements (name -> CREATE ...) whose names don't exist yet,
+        concurrently with one session per statement, then wait for them to come online.
+        Raises RuntimeError if any statement fails.
+        """
+        existing = self._existing_schema_names()
+        missing = [query for name, query in statements.items() if name not in existing]
+        if not missing:
+            print("   Already present")
+            return
+
+        def run(query):
+            with self.driver.session() as session:
                 try:
-                    session.run(query)
-                except Exception:
-                    pass
-        
+                    session.run(query).consume()
+                    return None
+                except Exception as e:
+                    return f"{query}: {e}"
+
+        workers = max(1, min(len(missing), NEO4J_LOAD_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = [error for error in pool.map(run, missing) if error]
+        if errors:
+            # e.g. duplicate ids; without the constraints every id lookup is a label scan
+            for error in errors:
+                print(f"   ❌ {error}")
+            raise RuntimeError(
+                f"{len(errors)} schema statement(s) failed; "
+                "clear the database and load again to drop duplicate nodes"
+            )
+
+        # Block until the server has finished populating the new indexes
+        try:
+            self.session.run(
+                "CALL db.awaitIndexes($timeout)", timeout=NEO4J_INDEX_AWAIT_SECONDS
+            ).consume()
+        except Exception as e:
+            print(f"⚠️  Waiting for indexes failed: {e}")
+
+    def create_constraints(self):
+        """Create id uniqueness constraints (built in bulk once nodes are loaded)"""
+        print("🔧 Creating constraints...")
+        self._run_schema_statements({
+            "repo_id": "CREATE CONSTRAINT repo_id IF NOT EXISTS FOR (n:Repository) REQUIRE n.id IS UNIQUE",
+            "dir_id": "CREATE CONSTRAINT dir_id IF NOT EXISTS FOR (n:Directory) REQUIRE n.id IS UNIQUE",
+            "file_id": "CREATE CONSTRAINT file_id IF NOT EXISTS FOR (n:File) REQUIRE n.id IS UNIQUE",
+            "class_id": "CREATE CONSTRAINT class_id IF NOT EXISTS FOR (n:Class) REQUIRE n.id IS UNIQUE",
+            "func_id": "CREATE CONSTRAINT func_id IF NOT EXISTS FOR (n:Function) REQUIRE n.id IS UNIQUE",
+            "method_id": "CREATE CONSTRAINT method_id IF NOT EXISTS FOR (n:Method) REQUIRE n.id IS UNIQUE",
+            "var_id": "CREATE CONSTRAINT var_id IF NOT EXISTS FOR (n:Variable) REQUIRE n.id IS UNIQUE",
+            "param_id": "CREATE CONSTRAINT param_id IF NOT EXISTS FOR (n:Parameter) REQUIRE n.id IS UNIQUE",
+            "import_id": "CREATE CONSTRAINT import_id IF NOT EXISTS FOR (n:Import) REQUIRE n.id IS UNIQUE",
+            "decorator_id": "CREATE CONSTRAINT decorator_id IF NOT EXISTS FOR (n:Decorator) REQUIRE n.id IS UNIQUE",
+        })
         print("✅ Constraints created")
+
+    def create_indexes(self):
+        """Create secondary lookup indexes"""
+        print("🔧 Creating indexes...")
+        self._run_schema_statements({
+            "file_name": "CREATE INDEX file_name IF NOT EXISTS FOR (n:File) ON (n.name)",
+            "class_name": "CREATE INDEX class_name IF NOT EXISTS FOR (n:Class) ON (n.name)",
+        })
         print("✅ Indexes created")
 
+    def create_constraints_and_indexes(self):
+        """Create constraints and indexes"""
+        self.create_constraints()
+        self.create_indexes()
+
 
     def create_vector_indexes(self):
         """
@@ -1290,9 +2105,9 @@ class Neo4jRepositoryLoader:
         """
         print("🧠 Creating vector indexes on embedding_semantics...")
         
-        with self.driver.session() as session:
+        session = self.session
         # Step 1: Verify embedding_semantics property exists
-            print("   📊 Verifying embedding_semantics data...")
+        print("   📊 Verifying embedding_semantics data...")
         verification_query = """
         MATCH (n) 
         WHERE n.embedding_semantics IS NOT NULL 
@@ -1367,7 +2182,7 @@ class Neo4jRepositoryLoader:
         created_count = 0
         for index_config in vector_index_queries:
             try:
-                session.run(index_config["query"])
+                session.run(index_config["query"]).consume()
                 print(f"      ✅ {index_config['label']} index created")
                 created_count += 1
             except Exception as e:
@@ -1385,157 +2200,249 @@ class Neo4jRepositoryLoader:
         print(f"   ✅ {created_count} vector indexes created successfully")
         return True
 
-
     
-    def load_jsonl(self, filepath: Path) -> List[Dict]:
-        """Load JSONL file"""
-        print(f"📂 Loading {filepath.name}...")
-        items = []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    items.append(json.loads(line))
-        print(f"   ✅ Loaded {len(items)} items")
-        return items
-    
-    def batch_insert_nodes(self, nodes: List[Dict], batch_size: int = 1000):
-        """Insert nodes with proper handling"""
-        print("📥 Inserting nodes...")
-        nodes_by_type = defaultdict(list)
-        
-        for node in nodes:
-            node_copy = node.copy()
-            node_type = node_copy.pop('type')
-            nodes_by_type[node_type].append(node_copy)
-        
-        total_inserted = 0
-        
-        with self.driver.session() as session:
-            type_order = [
-                'Repository', 'Directory', 'File', 'Module',
-                'Class', 'Function', 'Method', 
-                'Variable', 'Parameter', 'Decorator', 'Import'
-            ]
+    def _write_stream(self, typed_rows: Iterable[Tuple[Any, Dict]], query_for, batch_params, counter: Optional[str],
+                      batch_size: int = NEO4J_BATCH_SIZE, write_rows=None,
+                      workers: int = NEO4J_LOAD_WORKERS) -> Dict[Any, int]:
+        """
+        Consume (key, row) pairs, buffering rows per key (label, or relationship
+        type + endpoint labels) and handing each full
+        transaction's worth (batch_size * NEO4J_BATCHES_PER_TX rows) to an async
+        writer (write_rows, default _write_rows), so parsing the input overlaps with writing.
+        At most workers buffers are in flight at once.
+        batch_params(rows) turns a batch into the query's parameters.
+        Returns the summed summary counter per key (see _summary_count).
+        """
+        return asyncio.run(self._write_stream_async(
+            typed_rows, query_for, batch_params, counter, batch_size, write_rows or self._write_rows, workers
+        ))
+    
+    async def _write_stream_async(self, typed_rows: Iterable[Tuple[Any, Dict]], query_for, batch_params,
+                                  counter: Optional[str], batch_size: int, write_rows,
+                                  workers: int) -> Dict[Any, int]:
+        """
+        Up to workers buffers in flight on one async driver. The input is read
+        on a worker thread, since iterating it blocks (file reads, or waiting on
+        the analysis queue in stream mode) and would otherwise stall the writers.
+        """
+        flush_size = batch_size * NEO4J_BATCHES_PER_TX
+        sem = asyncio.Semaphore(workers)
+        written: Dict[Any, int] = defaultdict(int)
+        tasks = []
+        loop = asyncio.get_running_loop()
+        
+        async with AsyncGraphDatabase.driver(self.uri, **self.driver_config) as driver:
+            async def run(row_type, rows: List[Dict]):
+                try:
+                    # Awaited before the +=, which would otherwise read the total before suspending
+                    count = await write_rows(driver, query_for(row_type), rows, batch_params, counter, batch_size)
+                    written[row_type] += count
+                finally:
+                    sem.release()
             
-            for node_type in type_order:
-                if node_type not in nodes_by_type:
-                    continue
+            async def submit(row_type, rows: List[Dict]):
+                await sem.acquire()
+                tasks.append(asyncio.ensure_future(run(row_type, rows)))
+            
+            def read():
+                # Each full buffer waits for a free writer slot, so reading can't run
+                # ahead of the writers and no finished buffer sits in a queue
+                def hand_off(row_type, rows: List[Dict]):
+                    asyncio.run_coroutine_threadsafe(submit(row_type, rows), loop).result()
                 
-                type_nodes = nodes_by_type[node_type]
-                print(f"   📦 {node_type}: {len(type_nodes)} nodes", end=" ")
+                # Plain appends: buffers are capped at flush_size, so growth is bounded, and
+                # pre-sized buffers filled by index measured ~50% slower per row
+                buffers: Dict[Any, List[Dict]] = defaultdict(list)
+                for row_type, row in typed_rows:
+                    buffer = buffers[row_type]
+                    buffer.append(row)
+                    if len(buffer) >= flush_size:
+                        hand_off(row_type, buffer)
+                        buffers[row_type] = []
                 
-                for i in range(0, len(type_nodes), batch_size):
-                    batch = type_nodes[i:i+batch_size]
-                    
-                    cleaned_batch = []
-                    for node in batch:
-                        cleaned_node = {}
-                        for key, value in node.items():
-                            if value is not None:
-                                if isinstance(value, (list, dict)):
-                                    cleaned_node[key] = json.dumps(value)
-                                else:
-                                    cleaned_node[key] = value
-                        cleaned_batch.append(cleaned_node)
-                    
-                    query = f"""
-                    UNWIND $batch AS nodeData 
-                    CREATE (n:{node_type}) 
-                    SET n = nodeData
-                    """
-                    
-                    try:
-                        session.run(query, batch=cleaned_batch)
-                        total_inserted += len(batch)
-                    except Exception as e:
-                        print(f"\n      ⚠️  Batch error: {e}")
-                        for single_node in cleaned_batch:
-                            try:
-                                session.run(query, batch=[single_node])
-                                total_inserted += 1
-                            except:
-                                pass
+                for row_type, rows in buffers.items():
+                    if rows:
+                        hand_off(row_type, rows)
+            
+            try:
+                await asyncio.to_thread(read)
+            finally:
+                await asyncio.gather(*tasks)
+        
+        return written
+    
+    async def _write_rows(self, driver, query: str, rows: List[Dict], batch_params, counter: Optional[str],
+                          batch_size: int) -> int:
+        """Write one buffer of rows on a dedicated session"""
+        async with driver.session() as session:
+            return await self._write_batches(session, query, rows, batch_params, counter, batch_size)
+    
+    async def _write_node_rows(self, driver, node_type: str, rows: List[Dict], batch_params,
+                               counter: Optional[str], batch_size: int) -> int:
+        """
+        Write one buffer of nodes in a single CALL { ... } IN TRANSACTIONS statement.
+        Subtransactions that committed before a failure stay committed, so after
+        an error only the rows whose ids did not land are retried.
+        """
+        written = 0
+        retries = 0
+        async with driver.session() as session:
+            while rows:
+                query = _node_insert_in_transactions_query(node_type, batch_size, self.columnar)
+                try:
+                    summary = await (await session.run(query, batch_params(rows))).consume()
+                    return written + _summary_count(summary, counter, rows)
+                except Exception as e:
+                    error = e
                 
-                print("✅")
+                # Rows in subtransactions that committed before the failure
+                missing = await self._missing_node_rows(session, node_type, rows)
+                written += len(rows) - len(missing)
+                rows = missing
+                if _is_memory_pool_error(error) and batch_size > 1:
+                    batch_size = max(1, batch_size // 2)
+                    print(f"      ⚠️  Transaction memory limit hit, retrying with transactions of {batch_size} rows")
+                elif _is_transient_error(error) and retries < NEO4J_TRANSIENT_RETRIES:
+                    retries += 1
+                    await asyncio.sleep(0.5 * retries)
+                else:
+                    print(f"      ⚠️  Batch error: {error}")
+                    return written + await self._write_fallback(
+                        session, _node_insert_query(node_type, self.columnar), rows, batch_params, counter, batch_size
+                    )
+        return written
+    
+    @staticmethod
+    async def _missing_node_rows(session, node_type: str, rows: List[Dict]) -> List[Dict]:
+        """Rows of a failed write whose nodes were not committed"""
+        result = await session.run(
+            f"MATCH (n:{node_type}) WHERE n.id IN $ids RETURN collect(n.id) AS ids",
+            ids=[row['id'] for row in rows],
+        )
+        committed = set((await result.single())["ids"])
+        return [row for row in rows if row['id'] not in committed]
+    
+    async def _write_batches(self, session, query: str, rows: List[Dict], batch_params, counter: Optional[str],
+                             batch_size: int = NEO4J_BATCH_SIZE) -> int:
+        """
+        Run an UNWIND $batch query over rows, committing NEO4J_BATCHES_PER_TX
+        batches per explicit transaction instead of one auto-commit per batch.
+        Returns the summed summary counter (e.g. "nodes_created").
+        """
+        written = 0
+        start = 0
+        retries = 0
+        while start < len(rows):
+            tx_rows = rows[start:start + batch_size * NEO4J_BATCHES_PER_TX]
+            try:
+                written += await self._write_transaction(session, query, tx_rows, batch_params, counter, batch_size)
+            except Exception as e:
+                if _is_memory_pool_error(e) and batch_size > 1:
+                    batch_size = max(1, batch_size // 2)
+                    print(f"      ⚠️  Transaction memory limit hit, retrying with batches of {batch_size}")
+                    continue
+                if _is_transient_error(e) and retries < NEO4J_TRANSIENT_RETRIES:
+                    retries += 1
+                    await asyncio.sleep(0.5 * retries)
+                    continue
+                print(f"      ⚠️  Batch error: {e}")
+                written += await self._write_fallback(session, query, tx_rows, batch_params, counter, batch_size)
+            start += len(tx_rows)
+            retries = 0
+        return written
+    
+    async def _write_transaction(self, session, query: str, rows: List[Dict], batch_params, counter: Optional[str],
+                                 batch_size: int) -> int:
+        """Write rows in batch_size UNWIND statements inside a single transaction"""
+        written = 0
+        async with await session.begin_transaction() as tx:
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                summary = await (await tx.run(query, batch_params(batch))).consume()
+                written += _summary_count(summary, counter, batch)
+            await tx.commit()
+        return written
+    
+    async def _write_fallback(self, session, query: str, rows: List[Dict], batch_params, counter: Optional[str],
+                              batch_size: int) -> int:
+        """Retry a failed transaction batch by batch, then row by row, so a bad row only loses itself"""
+        written = 0
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            try:
+                summary = await (await session.run(query, batch_params(batch))).consume()
+                written += _summary_count(summary, counter, batch)
+            except Exception:
+                for row in batch:
+                    try:
+                        summary = await (await session.run(query, batch_params([row]))).consume()
+                        written += _summary_count(summary, counter, [row])
+                    except Exception:
+                        pass
+        return written
+    
+    def batch_insert_nodes(self, nodes: Iterable[Dict], batch_size: int = NEO4J_BATCH_SIZE,
+                           merge: bool = False, encoded: bool = False):
+        """
+        Insert nodes with proper handling (streamed, labels written concurrently).
+        With merge, existing nodes are updated by id instead of duplicated;
+        encoded records (see storable_record) skip property cleaning.
+        """
+        print("📥 Merging nodes..." if merge else "📥 Inserting nodes...")
+        batch_params = partial(_node_batch_params, columnar=self.columnar)
+        rows = _tag_node_rows(_node_rows(nodes, encoded), self.load_run)
+        
+        # Labels are independent while creating nodes, so their buffers are written in parallel
+        if merge:
+            # MERGE is safe to retry, so these go through the explicit-transaction path;
+            # the count is rows merged, as updates create nothing
+            written = self._write_stream(
+                rows, partial(_node_merge_query, columnar=self.columnar), batch_params,
+                None, batch_size
+            )
+        else:
+            # Each buffer is one statement the server commits every batch_size rows
+            written = self._write_stream(
+                rows, lambda node_type: node_type, batch_params,
+                "nodes_created", batch_size, write_rows=self._write_node_rows
+            )
         
-        print(f"✅ Inserted {total_inserted} nodes")
+        for node_type in NODE_TYPE_ORDER:
+            if node_type in written:
+                print(f"   📦 {node_type}: {written[node_type]} nodes ✅")
+        
+        total_inserted = sum(written.values())
+        print(f"✅ {'Merged' if merge else 'Inserted'} {total_inserted} nodes")
         return total_inserted
     
-    def batch_insert_edges(self, edges: List[Dict], batch_size: int = 1000):
-        """Insert edges with proper handling"""
+    def batch_insert_edges(self, edges: Iterable[Dict], batch_size: int = NEO4J_BATCH_SIZE,
+                           encoded: bool = False):
+        """Insert edges with proper handling (streamed, relationship types written concurrently)"""
         print("🔗 Creating relationships...")
-        edges_by_type = defaultdict(list)
-        
-        for edge in edges:
-            edges_by_type[edge['type']].append(edge)
+        skipped_by_type: Dict[str, int] = defaultdict(int)
+        
+        # Writers can contend for the same end nodes, so only NEO4J_EDGE_LOAD_WORKERS
+        # run at once; _write_batches retries the remaining transient deadlocks
+        written = self._write_stream(
+            _edge_rows(edges, skipped_by_type, encoded), partial(_edge_insert_query, columnar=self.columnar),
+            partial(_edge_batch_params, columnar=self.columnar), "relationships_created", batch_size,
+            workers=NEO4J_EDGE_LOAD_WORKERS
+        )
         
-        total_inserted = 0
-        skipped_external = 0
+        # Rows were written per (type, from label, to label); report per type
+        written_by_type: Dict[str, int] = defaultdict(int)
+        for (edge_type, _, _), count in written.items():
+            written_by_type[edge_type] += count
         
-        with self.driver.session() as session:
-            for edge_type in sorted(edges_by_type.keys()):
-                type_edges = edges_by_type[edge_type]
-                print(f"   🔗 {edge_type}: {len(type_edges)} edges", end=" ")
-                
-                direct = [e for e in type_edges if ('to_id' in e or 'to' in e)]
-                inferred = len(type_edges) - len(direct)
-                skipped_external += inferred
-                
-                for i in range(0, len(direct), batch_size):
-                    batch = direct[i:i+batch_size]
-                    
-                    normalized_batch = []
-                    for edge in batch:
-                        normalized = {}
-                        
-                        if 'from_id' in edge:
-                            normalized['from'] = edge['from_id']
-                        elif 'from' in edge:
-                            normalized['from'] = edge['from']
-                        
-                        if 'to_id' in edge:
-                            normalized['to'] = edge['to_id']
-                        elif 'to' in edge:
-                            normalized['to'] = edge['to']
-                        
-                        props = {}
-                        for key, value in edge.items():
-                            if key not in ['type', 'from', 'to', 'from_id', 'to_id', 'to_name']:
-                                if value is not None:
-                                    if isinstance(value, (list, dict)):
-                                        props[key] = json.dumps(value)
-                                    else:
-                                        props[key] = value
-                        
-                        normalized['properties'] = props
-                        normalized_batch.append(normalized)
-                    
-                    query = f"""
-                    UNWIND $batch AS edge 
-                    MATCH (from {{id: edge.from}}) 
-                    MATCH (to {{id: edge.to}}) 
-                    CREATE (from)-[r:{edge_type}]->(to) 
-                    SET r = edge.properties
-                    """
-                    
-                    try:
-                        result = session.run(query, batch=normalized_batch)
-                        summary = result.consume()
-                        total_inserted += summary.counters.relationships_created
-                    except Exception:
-                        for single_edge in normalized_batch:
-                            try:
-                                result = session.run(query, batch=[single_edge])
-                                summary = result.consume()
-                                total_inserted += summary.counters.relationships_created
-                            except:
-                                pass
-                
-                if inferred > 0:
-                    print(f"✅ (skipped {inferred} external)")
-                else:
-                    print("✅")
+        for edge_type in sorted(set(written_by_type) | set(skipped_by_type)):
+            inferred = skipped_by_type.get(edge_type, 0)
+            if inferred > 0:
+                print(f"   🔗 {edge_type}: {written_by_type[edge_type]} edges ✅ (skipped {inferred} external)")
+            else:
+                print(f"   🔗 {edge_type}: {written_by_type[edge_type]} edges ✅")
         
+        total_inserted = sum(written.values())
+        skipped_external = sum(skipped_by_type.values())
         print(f"✅ Created {total_inserted} relationships")
         if skipped_external > 0:
             print(f"ℹ️  Skipped {skipped_external} external references")
@@ -1543,12 +2450,162 @@ class Neo4jRepositoryLoader:
         return total_inserted
 
 
+# ============================================================================
+# NEO4J-ADMIN BULK IMPORT
+# ============================================================================
+
+# neo4j-admin executable and target database for --bulk-import
+NEO4J_ADMIN = os.environ.get("NEO4J_ADMIN", "neo4j-admin")
+NEO4J_DATABASE = os.environ.get("NEO4J_DATABASE", "neo4j")
+
+# Directory (under the output directory) holding the generated import CSVs
+IMPORT_CSV_DIRNAME = "neo4j_import"
+
+# neo4j-admin header types of property values (anything else is stored as a string)
+_CSV_TYPES = {bool: "boolean", int: "long", float: "double"}
+
+
+def _collect_csv_columns(rows: Iterable[Tuple[Any, Dict]], columns: Dict[Any, Dict[str, str]]):
+    """Record each key's property names and their neo4j-admin type (mixed types become string)"""
+    for key, props in rows:
+        key_columns = columns[key]
+        for name, value in props.items():
+            if value is None:
+                continue
+            value_type = _CSV_TYPES.get(value.__class__, "string")
+            if key_columns.setdefault(name, value_type) != value_type:
+                key_columns[name] = "string"
+
+
+def _csv_header(columns: Dict[str, str], names: List[str]) -> List[str]:
+    """name[:type] header fields (string is neo4j-admin's default type)"""
+    return [name if columns[name] == "string" else f"{name}:{columns[name]}" for name in names]
+
+
+def _csv_cell(value: Any) -> Any:
+    """CSV field for a property value (an empty field stores no property)"""
+    if value is None:
+        return ""
+    if value.__class__ is bool:
+        return "true" if value else "false"
+    return value
+
+
+def export_import_csv(nodes_path: Path, edges_path: Path, csv_dir: Path,
+                      encoded: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Write the JSONL as neo4j-admin import CSVs, one file per label and per
+    relationship type. The JSONL is read twice: once for the columns, once
+    for the rows. Returns the --nodes and --relationships arguments.
+    Nodes carry the same load_run/repository_id stamps as a Bolt load, so a
+    later --reload can delete the ones it no longer writes.
+    """
+    csv_dir.mkdir(parents=True, exist_ok=True)
+    skipped_by_type: Dict[str, int] = defaultdict(int)
+    load_run = uuid.uuid4().hex
+    
+    def node_rows():
+        return _tag_node_rows(_node_rows(iter_jsonl(nodes_path), encoded), load_run)
+    
+    def edge_rows():
+        for (edge_type, _, _), edge in _edge_rows(iter_jsonl(edges_path), skipped_by_type, encoded):
+            yield edge_type, edge
+    
+    node_columns: Dict[str, Dict[str, str]] = defaultdict(dict)
+    edge_columns: Dict[str, Dict[str, str]] = defaultdict(dict)
+    _collect_csv_columns(node_rows(), node_columns)
+    _collect_csv_columns(((edge_type, edge['properties']) for edge_type, edge in edge_rows()), edge_columns)
+    
+    # Node ids are unique across labels, so all labels share one ID space
+    node_args, relationship_args = [], []
+    with contextlib.ExitStack() as stack:
+        def open_csv(name: str, header: List[str]):
+            path = csv_dir / name
+            f = stack.enter_context(path.open('w', encoding='utf-8', newline=''))
+            writer = csv.writer(f)
+            writer.writerow(header)
+            return path, writer
+        
+        node_writers = {}
+        for node_type, columns in node_columns.items():
+            names = [name for name in columns if name != 'id']
+            header = ["id:ID"] + _csv_header(columns, names)
+            path, writer = open_csv(f"nodes_{node_type}.csv", header)
+            node_writers[node_type] = (writer, names)
+            node_args.append(f"--nodes={node_type}={path}")
+        
+        edge_writers = {}
+        for edge_type, columns in edge_columns.items():
+            names = list(columns)
+            header = [":START_ID", ":END_ID"] + _csv_header(columns, names)
+            path, writer = open_csv(f"relationships_{edge_type}.csv", header)
+            edge_writers[edge_type] = (writer, names)
+            relationship_args.append(f"--relationships={edge_type}={path}")
+        
+        print("📝 Writing import CSVs...")
+        for node_type, props in node_rows():
+            writer, names = node_writers[node_type]
+            writer.writerow([props['id']] + [_csv_cell(props.get(name)) for name in names])
+        for edge_type, edge in edge_rows():
+            writer, names = edge_writers[edge_type]
+            props = edge['properties']
+            writer.writerow([edge['from'], edge['to']] + [_csv_cell(props.get(name)) for name in names])
+    
+    print(f"✅ Wrote {len(node_args)} node files and {len(relationship_args)} relationship files to {csv_dir}/")
+    return node_args, relationship_args
+
+
+def run_admin_import(node_args: List[str], relationship_args: List[str],
+                     database: str = NEO4J_DATABASE) -> bool:
+    """
+    Build the database offline with neo4j-admin (replacing its contents).
+    The database must be stopped, and neo4j-admin must run on the server host.
+    """
+    command = [
+        NEO4J_ADMIN, "database", "import", "full",
+        "--overwrite-destination=true",
+        # Source code and docstrings span lines
+        "--multiline-fields=true",
+        # Edges whose endpoint was not extracted are dropped, as the Bolt loader's MATCH does
+        "--skip-bad-relationships=true",
+        *node_args, *relationship_args, database,
+    ]
+    print(f"🚚 Running {NEO4J_ADMIN} database import full {database}...")
+    try:
+        result = subprocess.run(command)
+    except FileNotFoundError:
+        print(f"❌ {NEO4J_ADMIN} not found (set NEO4J_ADMIN to its path)")
+        return False
+    if result.returncode != 0:
+        print(f"❌ neo4j-admin import failed (exit code {result.returncode})")
+        return False
+    print("✅ Bulk import complete")
+    return True
+
+
 # ============================================================================
 # MAIN PIPELINE
 # ============================================================================
 
-def analyze_repository(repo_path: Path, output_dir: Path, exclude: List[str], clean: bool) -> bool:
-    """Analyze repository and generate JSONL files"""
+class _TeeWriter:
+    """Binary file wrapper that also hands every written chunk to a callback"""
+    
+    def __init__(self, f, on_write):
+        self.f = f
+        self.on_write = on_write
+    
+    def write(self, data: bytes):
+        self.f.write(data)
+        self.on_write(data)
+
+
+def analyze_repository(repo_path: Path, output_dir: Path, exclude: List[str], clean: bool,
+                       workers: Optional[int] = None, use_cache: bool = True,
+                       use_existing: Optional[bool] = None, on_nodes=None) -> bool:
+    """
+    Analyze repository and generate JSONL files. on_nodes, if given, also
+    receives each chunk of node JSONL as it is written (see --stream).
+    """
     
     print_section("Repository Analysis")
     
@@ -1574,8 +2631,7 @@ def analyze_repository(repo_path: Path, output_dir: Path, exclude: List[str], cl
         print(f"   • {nodes_path.name}")
         print(f"   • {edges_path.name}")
         
-        use_existing = input("   Use existing files? (yes/no): ").lower()
-        if use_existing == 'yes':
+        if ask_yes_no("   Use existing files? (yes/no): ", use_existing):
             print("✅ Using existing JSONL files")
             return True
         else:
@@ -1588,41 +2644,50 @@ def analyze_repository(repo_path: Path, output_dir: Path, exclude: List[str], cl
     print(f"📁 Repository: {repo_path.name}")
     print(f"📂 Output: {output_dir}/")
     
-    # Build directory tree
-    print("\n🌳 Building directory structure...")
-    dir_to_id, dir_nodes, dir_edges = build_directory_tree(repo_path, exclude)
-    write_jsonl(nodes_path, dir_nodes)
-    write_jsonl(edges_path, dir_edges)
-    print(f"   ✅ Created {len(dir_nodes)} directory nodes")
-    
-    # Find Python files
-    py_files = find_python_files(repo_path, exclude)
-    print(f"🔍 Found {len(py_files)} Python files")
-    
-    if len(py_files) == 0:
-        print("⚠️  No Python files found!")
-        return False
-    
-    # Process files
-    total_stats = defaultdict(int)
-    errors = 0
-    
-    print("\n⚙️  Processing files...")
-    for i, file_path in enumerate(py_files, 1):
-        if i % 10 == 0 or i == len(py_files):
-            print(f"   Progress: {i}/{len(py_files)} files...")
+    # One buffered handle per output for the whole run, instead of an open/append/close per file
+    with open_jsonl(nodes_path) as nodes_f, open_jsonl(edges_path) as edges_f:
+        if on_nodes is not None:
+            nodes_f = _TeeWriter(nodes_f, on_nodes)
         
-        nodes, edges, stats = extract_file(repo_path, file_path)
+        # Build directory tree
+        print("\n🌳 Building directory structure...")
+        dir_to_id, dir_nodes, dir_edges = build_directory_tree(repo_path, exclude)
+        write_jsonl_items(nodes_f, dir_nodes)
+        write_jsonl_items(edges_f, dir_edges)
+        print(f"   ✅ Created {len(dir_nodes)} directory nodes")
         
-        if not nodes and not edges:
-            errors += 1
-            continue
+        # Find Python files
+        py_files = find_python_files(repo_path, exclude)
+        print(f"🔍 Found {len(py_files)} Python files")
+        
+        if len(py_files) == 0:
+            print("⚠️  No Python files found!")
+            return False
         
-        write_jsonl(nodes_path, nodes)
-        write_jsonl(edges_path, edges)
+        # Process files
+        total_stats = defaultdict(int)
+        errors = 0
         
-        for key, val in stats.items():
-            total_stats[key] += val
+        cache_dir = None
+        if use_cache:
+            cache_dir = output_dir / EXTRACTION_CACHE_DIRNAME
+            print(f"♻️  Reusing cached results for unchanged files ({cache_dir})")
+        
+        print("\n⚙️  Processing files...")
+        for i, (nodes, edges, stats) in enumerate(extract_files(repo_path, py_files, workers, cache_dir), 1):
+            if i % 10 == 0 or i == len(py_files):
+                print(f"   Progress: {i}/{len(py_files)} files...")
+            
+            if not nodes and not edges:
+                errors += 1
+                continue
+            
+            # Already-serialized JSONL from the workers
+            nodes_f.write(nodes)
+            edges_f.write(edges)
+            
+            for key, val in stats.items():
+                total_stats[key] += val
     
     # Write statistics
     final_stats = {
@@ -1640,6 +2705,8 @@ def analyze_repository(repo_path: Path, output_dir: Path, exclude: List[str], cl
         "total_variables": total_stats["variables"],
         "total_decorators": total_stats["decorators"],
         "analysis_timestamp": datetime.now().isoformat(),
+        # List/dict properties in the JSONL are already JSON strings
+        "properties_encoded": True,
     }
     
     with stats_path.open('w', encoding='utf-8') as f:
@@ -1664,8 +2731,80 @@ def analyze_repository(repo_path: Path, output_dir: Path, exclude: List[str], cl
     return True
 
 
-def load_to_neo4j(output_dir: Path, neo4j_uri: str, neo4j_user: str, neo4j_pass: str, force_clear: bool = False) -> bool:
-    """Load JSONL files into Neo4j"""
+# Node JSONL chunks (one per file) buffered between a streaming analysis and the loader
+STREAM_QUEUE_CHUNKS = 256
+
+
+def _properties_encoded(stats_path: Path) -> bool:
+    """Whether the analysis stored list/dict properties as JSON strings already"""
+    # Files from older analyses still hold raw list/dict values for the loader to encode
+    if not stats_path.exists():
+        return False
+    with stats_path.open(encoding='utf-8') as f:
+        return json.load(f).get("properties_encoded", False)
+
+
+def _load_nodes_while_analyzing(loader: "Neo4jRepositoryLoader", analyze,
+                                merge: bool) -> Tuple[bool, Optional[int]]:
+    """
+    Run analyze(on_nodes=...) while a loader thread inserts the node records it
+    writes, so nodes reach Neo4j without being read back from nodes.jsonl.
+    Returns (analysis succeeded, nodes inserted); the count is None when no
+    nodes were produced (e.g. existing JSONL files were reused).
+    """
+    chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    
+    def records() -> Iterator[Dict]:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            for line in chunk.splitlines():
+                if line and not line.isspace():
+                    yield loads(line)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        consumer = None
+        
+        def put(chunk: Optional[bytes]):
+            # A failed loader stops reading, so don't block on a full queue forever
+            while True:
+                try:
+                    chunks.put(chunk, timeout=1)
+                    return
+                except queue.Full:
+                    if consumer.done():
+                        consumer.result()
+                        return
+        
+        def on_nodes(chunk: bytes):
+            nonlocal consumer
+            if consumer is None:
+                # Freshly analyzed records are always written encoded
+                consumer = executor.submit(loader.batch_insert_nodes, records(), merge=merge, encoded=True)
+            put(chunk)
+        
+        try:
+            analyzed = analyze(on_nodes=on_nodes)
+        finally:
+            if consumer is not None:
+                put(None)
+        
+        return analyzed, consumer.result() if consumer is not None else None
+
+
+def load_to_neo4j(output_dir: Path, neo4j_uri: str, neo4j_user: str, neo4j_pass: str,
+                  clear: Optional[bool] = None, reload: bool = False, bulk_import: bool = False,
+                  analyze=None) -> bool:
+    """
+    Load JSONL files into Neo4j. With reload, nodes are merged by id, their
+    relationships rebuilt and the repository's nodes that no longer exist
+    deleted, so a re-run updates the graph without clearing it.
+    With bulk_import, the database is rebuilt offline by neo4j-admin instead.
+    With analyze (a callable taking on_nodes, see analyze_repository), the
+    analysis runs here and its nodes are loaded as they are extracted.
+    """
     
     print_section("Neo4j Loading")
     
@@ -1676,45 +2815,78 @@ def load_to_neo4j(output_dir: Path, neo4j_uri: str, neo4j_user: str, neo4j_pass:
     
     nodes_path = output_dir / "nodes.jsonl"
     edges_path = output_dir / "edges.jsonl"
+    stats_path = output_dir / "stats.json"
     
-    if not nodes_path.exists() or not edges_path.exists():
+    if analyze is None and (not nodes_path.exists() or not edges_path.exists()):
         print(f"❌ JSONL files not found in {output_dir}/")
         return False
     
+    if bulk_import:
+        return bulk_import_to_neo4j(output_dir, nodes_path, edges_path, _properties_encoded(stats_path),
+                                    neo4j_uri, neo4j_user, neo4j_pass)
+    
     try:
         loader = Neo4jRepositoryLoader(neo4j_uri, neo4j_user, neo4j_pass)
         
         # Check existing data
         existing = loader.check_existing_data()
-        if existing > 0:
+        if existing > 0 and reload:
+            print(f"🔄 Database contains {existing} nodes, merging into the existing graph")
+        elif existing > 0:
             print(f"⚠️  Database contains {existing} nodes")
             
-            if force_clear:
+            if ask_yes_no("   Clear database before loading? (yes/no): ", clear):
                 loader.clear_database()
             else:
-                clear = input("   Clear database before loading? (yes/no): ").lower()
-                if clear == 'yes':
-                    loader.clear_database()
-                else:
-                    print("⚠️  Loading into existing database (may cause conflicts)")
+                # CREATE would duplicate existing ids and the constraints could not be built
+                print("🔄 Keeping existing data, merging into the existing graph")
+                reload = True
         else:
             print("✅ Database is empty")
         
-        # Phase 1: Create constraints and regular indexes (NO vector index yet)
+        # MERGE looks every node up by id, so on reload the constraints come first
+        if reload:
+            print("\n" + "="*80)
+            print("STEP 1: Creating Constraints")
+            print("="*80)
+            loader.create_constraints()
+        
+        # Load nodes; a fresh load has no schema in place yet, so CREATE
+        # pays no per-row index maintenance
         print("\n" + "="*80)
-        print("PHASE 1: Creating Constraints and Indexes")
+        print("STEP 2: Merging Nodes" if reload else "STEP 1: Loading Nodes")
         print("="*80)
-        loader.create_constraints_and_indexes()
+        nodes_inserted = None
+        if analyze is not None:
+            analyzed, nodes_inserted = _load_nodes_while_analyzing(loader, analyze, merge=reload)
+            if not analyzed:
+                print("❌ Analysis failed")
+                loader.close()
+                return False
+        if nodes_inserted is None:
+            # Records are streamed from disk straight into the write buffers
+            nodes_inserted = loader.batch_insert_nodes(
+                iter_jsonl(nodes_path), merge=reload, encoded=_properties_encoded(stats_path)
+            )
+        
+        # Nodes the reload did not write belong to code that no longer exists
+        if reload:
+            loader.delete_stale_nodes()
         
-        # Phase 2: Load data
+        # Otherwise build the id constraints in bulk now. Relationship loading
+        # MATCHes endpoints by id, so these must be online before edges.
+        if not reload:
+            print("\n" + "="*80)
+            print("STEP 2: Creating Constraints")
+            print("="*80)
+            loader.create_constraints()
+        
+        # Step 3: Load relationships, then the secondary indexes (NO vector index yet)
         print("\n" + "="*80)
-        print("PHASE 2: Loading Graph Data")
+        print("STEP 3: Loading Relationships and Indexes")
         print("="*80)
-        nodes = loader.load_jsonl(nodes_path)
-        edges = loader.load_jsonl(edges_path)
-        
-        nodes_inserted = loader.batch_insert_nodes(nodes)
-        edges_inserted = loader.batch_insert_edges(edges)
+        edges_inserted = loader.batch_insert_edges(iter_jsonl(edges_path), encoded=_properties_encoded(stats_path))
+        loader.create_indexes()
         
         loader.close()
         
@@ -1738,6 +2910,44 @@ def load_to_neo4j(output_dir: Path, neo4j_uri: str, neo4j_user: str, neo4j_pass:
 
 
 
+def bulk_import_to_neo4j(output_dir: Path, nodes_path: Path, edges_path: Path, encoded: bool,
+                         neo4j_uri: str, neo4j_user: str, neo4j_pass: str) -> bool:
+    """Replace the database via neo4j-admin, then create the schema once it is started"""
+    print("\n" + "="*80)
+    print("STEP 1: Writing Import CSVs")
+    print("="*80)
+    node_args, relationship_args = export_import_csv(
+        nodes_path, edges_path, output_dir / IMPORT_CSV_DIRNAME, encoded
+    )
+    
+    print("\n" + "="*80)
+    print("STEP 2: Running neo4j-admin Import (database must be stopped)")
+    print("="*80)
+    if not run_admin_import(node_args, relationship_args):
+        return False
+    
+    # The server has to be started on the new store before Bolt is available
+    print("\n" + "="*80)
+    print("STEP 3: Creating Constraints and Indexes")
+    print("="*80)
+    if not ask_yes_no(f"   Start the '{NEO4J_DATABASE}' database, then continue? (yes/no): "):
+        print("⚠️  Constraints and indexes not created; a later --reload run creates them")
+        return True
+    
+    try:
+        loader = Neo4jRepositoryLoader(neo4j_uri, neo4j_user, neo4j_pass)
+        loader.create_constraints_and_indexes()
+        loader.close()
+    except Exception as e:
+        print(f"❌ Error creating constraints and indexes: {e}")
+        return False
+    
+    print("\n" + "="*80)
+    print("✅ PHASE 2 COMPLETE: Graph Data Bulk Imported")
+    print("="*80)
+    return True
+
+
 def main():
     """Main execution with 4-phase pipeline"""
     
@@ -1764,6 +2974,18 @@ Examples:
     
     # Exclude directories
     python repo_to_neo4j.py --repo ~/code --exclude tests .venv docs
+    
+    # Limit analysis to 4 processes
+    python repo_to_neo4j.py --repo ~/code --workers 4
+    
+    # Scripted run: reuse existing JSONL, clear Neo4j without prompting
+    python repo_to_neo4j.py --repo ~/code --use-existing --clear
+    
+    # Re-run against a loaded graph, updating it in place
+    python repo_to_neo4j.py --repo ~/code --reload
+    
+    # Initial load of a large repository on the Neo4j host (database stopped)
+    python repo_to_neo4j.py --repo ~/code --bulk-import
         """
     )
     parser.add_argument("--remote_repo", help="Url of Github repo")
@@ -1772,8 +2994,23 @@ Examples:
     parser.add_argument("--output", help="Output directory (default: graph_data/<repo_name>)")
     parser.add_argument("--exclude", nargs="+", help="Additional directories to exclude")
     parser.add_argument("--clean", action="store_true", help="Clean existing data before analysis")
+    parser.add_argument("--workers", type=int, help="Processes used to analyze files (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse every file instead of reusing cached results for unchanged files")
+    parser.add_argument("--use-existing", dest="use_existing", action="store_const", const=True,
+                        help="Reuse existing JSONL files without asking")
+    parser.add_argument("--no-use-existing", dest="use_existing", action="store_const", const=False,
+                        help="Regenerate existing JSONL files without asking")
     parser.add_argument("--skip-neo4j", action="store_true", help="Skip Neo4j loading")
-    parser.add_argument("--force-clear", action="store_true", help="Automatically clear Neo4j database")
+    parser.add_argument("--clear", "--force-clear", dest="clear", action="store_const", const=True,
+                        help="Clear a non-empty Neo4j database without asking")
+    parser.add_argument("--no-clear", dest="clear", action="store_const", const=False,
+                        help="Load into a non-empty Neo4j database without asking")
+    parser.add_argument("--reload", action="store_true",
+                        help="Merge into an existing graph by node id instead of clearing it first")
+    parser.add_argument("--stream", action="store_true",
+                        help="Load nodes into Neo4j while the repository is analyzed, instead of after")
+    parser.add_argument("--bulk-import", action="store_true",
+                        help="Replace the (stopped) database offline with neo4j-admin import instead of loading over Bolt")
     parser.add_argument("--with-embeddings", action="store_true", help="Generate OpenAI vector embeddings after loading to Neo4j (requires OPENAI_API_KEY)")
     
     args = parser.parse_args()
@@ -1809,45 +3046,58 @@ Examples:
         print(f"   Excluded: {', '.join(args.exclude)}")
     print(f"   With Embeddings: {'Yes' if args.with_embeddings else 'No'}")
     
-    # ===== PHASE 1: ANALYZE REPOSITORY =====
-    print("\n" + "="*80)
-    print("PHASE 1: ANALYZING REPOSITORY & CREATING GRAPH DATA")
-    print("="*80)
+    # Get Neo4j credentials
+    neo4j_uri = os.environ.get("NEO4J_URI")
+    neo4j_user = os.environ.get("NEO4J_USERNAME")
+    neo4j_pass = os.environ.get("NEO4J_PASSWORD")
     
-    success = analyze_repository(
+    run_analysis = partial(
+        analyze_repository,
         repo_path=repo_path,
         output_dir=output_dir,
         exclude=args.exclude or [],
-        clean=args.clean
+        clean=args.clean,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        use_existing=args.use_existing
     )
     
-    if not success:
-        print("❌ Analysis failed")
-        sys.exit(1)
+    # With --stream the analysis runs inside the Neo4j load (PHASE 2), feeding it nodes directly
+    stream = (args.stream and not args.skip_neo4j and not args.bulk_import
+              and all([neo4j_uri, neo4j_user, neo4j_pass]))
     
-    print("\n✅ PHASE 1 COMPLETE: Graph data created with text embeddings")
-    print(f"   • nodes.jsonl created")
-    print(f"   • edges.jsonl created")
-    print(f"   • embedding_semantics property: TEXT (semantic descriptions)")
+    # ===== PHASE 1: ANALYZE REPOSITORY =====
+    if not stream:
+        print("\n" + "="*80)
+        print("PHASE 1: ANALYZING REPOSITORY & CREATING GRAPH DATA")
+        print("="*80)
+        
+        success = run_analysis()
+        
+        if not success:
+            print("❌ Analysis failed")
+            sys.exit(1)
+        
+        print("\n✅ PHASE 1 COMPLETE: Graph data created with text embeddings")
+        print(f"   • nodes.jsonl created")
+        print(f"   • edges.jsonl created")
+        print(f"   • embedding_semantics property: TEXT (semantic descriptions)")
     
     # ===== PHASE 2: LOAD TO NEO4J =====
     if not args.skip_neo4j:
         print("\n" + "="*80)
-        print("PHASE 2: LOADING GRAPH DATA TO NEO4J")
+        if stream:
+            print("PHASES 1-2: ANALYZING REPOSITORY & STREAMING GRAPH DATA TO NEO4J")
+        else:
+            print("PHASE 2: LOADING GRAPH DATA TO NEO4J")
         print("="*80)
         
-        # Get Neo4j credentials
-        neo4j_uri = os.environ.get("NEO4J_URI")
-        neo4j_user = os.environ.get("NEO4J_USERNAME")
-        neo4j_pass = os.environ.get("NEO4J_PASSWORD")
-        
         if not all([neo4j_uri, neo4j_user, neo4j_pass]):
             print("\n⚠️  Neo4j credentials not found in environment")
             print("   Set: NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD")
             print("   Or create a .env file with these variables")
             
-            skip = input("\n   Skip Neo4j loading? (yes/no): ").lower()
-            if skip != 'yes':
+            if not ask_yes_no("\n   Skip Neo4j loading? (yes/no): "):
                 sys.exit(1)
         else:
             success = load_to_neo4j(
@@ -1855,7 +3105,10 @@ Examples:
                 neo4j_uri=neo4j_uri,
                 neo4j_user=neo4j_user,
                 neo4j_pass=neo4j_pass,
-                force_clear=args.force_clear
+                clear=args.clear,
+                reload=args.reload,
+                bulk_import=args.bulk_import,
+                analyze=run_analysis if stream else None
             )
             
             if not success:
@@ -1900,12 +3153,9 @@ Examples:
                 try:
                     print("\n📊 Starting embedding generation...")
                     print("   This may take a while depending on the number of nodes")
-                    print("   Rate limit: 1 second between requests (60 req/min)\n")
+                    print("   Rate limit: adaptive delay between requests (backs off on 429)\n")
                     
-                    embed_functions()
-                    embed_files()
-                    embed_methods()
-                    embed_classes()
+                    embed_all()
                     verify()
                     
                     print("\n✅ PHASE 4 COMPLETE: Vector embeddings generated")
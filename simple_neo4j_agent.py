@@ -15,23 +15,135 @@ import logging
 import os
 import httpx
 import asyncio
-from typing import Optional
+from operator import itemgetter
+from typing import AsyncIterator, Dict, List, Optional
 from dotenv import load_dotenv
+import threading
 import time
 
-# Set up logging
+# Try to import orjson for faster response parsing, fall back to json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import ijson to parse agent responses incrementally as they stream in
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Try to import uvloop for a faster event loop (CLI only), fall back to asyncio's
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# HTTP/2 support is optional (needs the h2 package, e.g. pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Set up logging (warnings and errors only, unless AGENT_LOG_LEVEL asks for more)
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("AGENT_LOG_LEVEL", "WARNING").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+class AgentError(Exception):
+    """Base class for errors talking to the Aura agent"""
+
+
+class AgentAuthError(AgentError):
+    """The OAuth token could not be obtained or was rejected"""
+
+
+class AgentTimeout(AgentError):
+    """The agent did not answer in time"""
+
+
+class AgentResponseError(AgentError):
+    """The agent answered with an error status or an unreadable body"""
+
+
 # Global configuration
 client_id: Optional[str] = None
 client_secret: Optional[str] = None
 endpoint_url: Optional[str] = None
 bearer_token: Optional[str] = None
-token_expiry: float = 0
+token_expiry: float = 0  # on the time.monotonic() clock
+
+# Errors raised for a malformed response body
+_JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError) if IJSON_AVAILABLE else (json.JSONDecodeError,)
+
+# Streamed Format 1 item fields, by ijson prefix
+_CONTENT_ITEM_FIELDS = {"content.item.type": "type", "content.item.text": "text"}
+
+# Agent request headers; _agent_headers adds the current token and is rebuilt only when it changes
+_AGENT_HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+_agent_headers: Dict[str, str] = {}
+
+# Tokens are cached here so a restarted client can skip the OAuth round trip
+TOKEN_CACHE_PATH = os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "neo4j-agent",
+    "token.json"
+)
+
+# Treat tokens as expired this many seconds early (at most half their lifetime)
+TOKEN_EXPIRY_HEADROOM = 300
+
+# Refresh the token in the background this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 120
+
+# Token refresh state (the lock is created lazily, inside the running event loop)
+_token_lock: Optional[asyncio.Lock] = None
+_refresh_handle: Optional[asyncio.TimerHandle] = None
+_refresh_task: Optional["asyncio.Task[None]"] = None
+_warm_up_task: Optional["asyncio.Task[None]"] = None
+
+# Shared HTTP client, so every request reuses its pooled keep-alive connections
+# (multiplexed over a single HTTP/2 connection per host when h2 is installed)
+_client: Optional[httpx.AsyncClient] = None
+
+# Words that end the CLI session
+_EXIT_WORDS = frozenset({"exit", "quit", "bye", "q"})
+
+# Keep idle connections this long, so they survive the user's think time between questions
+HTTP_KEEPALIVE_SECONDS = 300.0
+
+# Event loop the client, token lock and in-flight requests belong to
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Questions currently in flight, so concurrent callers asking the same one share a request
+_in_flight: Dict[str, "asyncio.Future[str]"] = {}
+
+
+def _loads(data: bytes):
+    """Decode a JSON response body straight from bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(value) -> bytes:
+    """Encode a request body as compact JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _dumps_pretty(value) -> str:
+    """Encode a value as indented JSON for display"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(value, indent=2)
 
 
 def _load_config():
@@ -51,177 +163,557 @@ def _load_config():
             "Get these from Neo4j Aura console agent settings"
         )
     
-    logger.info(f"Configuration loaded successfully")
-    logger.info(f"Endpoint: {endpoint_url}")
+    logger.info("Configuration loaded successfully")
+    logger.info("Endpoint: %s", endpoint_url)
+
+
+def _check_loop():
+    """
+    Drop loop-bound state left behind by a previous event loop
+    
+    Embedders may call ask() from several asyncio.run() calls; the old
+    client's connections and the token lock cannot be used on a new loop.
+    """
+    global _client, _client_loop, _token_lock, _refresh_handle, _refresh_task, _warm_up_task
+    
+    loop = asyncio.get_running_loop()
+    if _client_loop is loop:
+        return
+    
+    if _client_loop is not None:
+        logger.debug("Event loop changed, recreating HTTP client")
+        _client = None
+        _token_lock = None
+        _refresh_handle = None
+        _refresh_task = None
+        _warm_up_task = None
+        _in_flight.clear()
+    _client_loop = loop
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use"""
+    global _client
+    
+    _check_loop()
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=HTTP_KEEPALIVE_SECONDS),
+            timeout=httpx.Timeout(120.0)
+        )
+    return _client
+
+
+async def _close_client():
+    """Close the shared HTTP client (before the event loop shuts down)"""
+    global _client
+    
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _load_cached_token() -> bool:
+    """Use the cached bearer token if it belongs to this client and is still valid"""
+    try:
+        with open(TOKEN_CACHE_PATH, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return False
+    
+    if not isinstance(cached, dict) or cached.get("client_id") != client_id:
+        return False
+    
+    # The cache stores wall-clock expiry, since monotonic time is per boot
+    token = cached.get("token")
+    expiry = cached.get("expiry", 0)
+    remaining = expiry - time.time() if isinstance(expiry, (int, float)) else 0
+    if not token or remaining <= 0:
+        return False
+    
+    _set_bearer_token(token, time.monotonic() + remaining)
+    logger.info("Using cached bearer token (expires in %ds)", remaining)
+    return True
+
+
+def _use_cached_token() -> bool:
+    """Start from the cached token if there is a valid one, scheduling its refresh"""
+    if not _load_cached_token():
+        return False
+    
+    _schedule_token_refresh(token_expiry - time.monotonic())
+    return True
+
+
+def _set_bearer_token(token: str, expiry: float):
+    """Install a new bearer token and the agent request headers that carry it"""
+    global bearer_token, token_expiry, _agent_headers
+    
+    bearer_token = token
+    token_expiry = expiry
+    _agent_headers = {**_AGENT_HEADERS, "Authorization": f"Bearer {token}"}
+
+
+def _save_cached_token():
+    """Write the bearer token to the cache file, readable by the owner only"""
+    try:
+        os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), mode=0o700, exist_ok=True)
+        tmp_path = f"{TOKEN_CACHE_PATH}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        expiry = time.time() + (token_expiry - time.monotonic())
+        with os.fdopen(fd, "w") as f:
+            json.dump({"client_id": client_id, "token": bearer_token, "expiry": expiry}, f)
+        os.replace(tmp_path, TOKEN_CACHE_PATH)
+    except OSError as e:
+        logger.warning("Could not cache bearer token: %s", e)
+
+
+def _get_token_lock() -> asyncio.Lock:
+    """Return the lock that serializes token requests"""
+    global _token_lock
+    
+    _check_loop()
+    if _token_lock is None:
+        _token_lock = asyncio.Lock()
+    return _token_lock
 
 
 async def _get_bearer_token() -> None:
+    """Get a new OAuth bearer token, one request at a time"""
+    async with _get_token_lock():
+        await _request_bearer_token()
+
+
+async def _request_bearer_token() -> None:
     """Get OAuth bearer token from Neo4j"""
-    global bearer_token, token_expiry
-    
     auth_url = "https://api.neo4j.io/oauth/token"
     
-    async with httpx.AsyncClient() as client:
-        try:
-            logger.info("Requesting OAuth token...")
-            
-            response = await client.post(
-                auth_url,
-                auth=(client_id, client_secret),
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                data={"grant_type": "client_credentials"},
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Token request failed: {response.status_code}")
-                logger.error(f"Response: {response.text}")
-                response.raise_for_status()
-            
-            token_data = response.json()
-            bearer_token = token_data.get("access_token")
-            expires_in = token_data.get("expires_in", 3600)
-            token_expiry = time.time() + expires_in - 60  # Refresh 1 min before expiry
-            
-            if not bearer_token:
-                raise ValueError("No access token in response")
+    client = _get_client()
+    
+    try:
+        logger.info("Requesting OAuth token...")
+        
+        response = await client.post(
+            auth_url,
+            auth=(client_id, client_secret),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={"grant_type": "client_credentials"},
+            timeout=30.0
+        )
+        
+        if response.status_code != 200:
+            logger.error("Token request failed: %s", response.status_code)
+            logger.error("Response: %s", response.text)
+            response.raise_for_status()
+        
+        token_data = _loads(response.content)
+        token = token_data.get("access_token")
+        expires_in = token_data.get("expires_in", 3600)
+        
+        if not token:
+            raise AgentAuthError("No access token in response")
+        
+        lifetime = expires_in - min(TOKEN_EXPIRY_HEADROOM, expires_in / 2)
+        _set_bearer_token(token, time.monotonic() + lifetime)
+        logger.info("Bearer token obtained (expires in %ss)", expires_in)
+        _save_cached_token()
+        _schedule_token_refresh(lifetime)
             
-            logger.info(f"Bearer token obtained (expires in {expires_in}s)")
-                
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP Error: {e}")
-            raise Exception(f"Failed to get bearer token: {e}")
-        except Exception as e:
-            logger.error(f"Token error: {e}")
-            raise
+    except httpx.HTTPError as e:
+        logger.error("HTTP Error: %s", e)
+        raise AgentAuthError(f"Failed to get bearer token: {e}") from e
+    except Exception as e:
+        logger.error("Token error: %s", e)
+        raise
+
+
+def _schedule_token_refresh(expires_in: float):
+    """Refresh the token in the background shortly before it expires (by token_expiry)"""
+    global _refresh_handle
+    
+    if _refresh_handle is not None:
+        _refresh_handle.cancel()
+    
+    if expires_in > 2 * TOKEN_REFRESH_MARGIN:
+        delay = expires_in - TOKEN_REFRESH_MARGIN
+    else:
+        delay = expires_in / 2
+    
+    _refresh_handle = asyncio.get_running_loop().call_later(delay, _start_token_refresh)
+
+
+def _start_token_refresh():
+    """Timer callback: run the token refresh as a task"""
+    global _refresh_task
+    
+    _refresh_task = asyncio.ensure_future(_refresh_token_in_background())
+
+
+async def _refresh_token_in_background():
+    """Refresh the token, leaving the current one in place on failure"""
+    try:
+        await _get_bearer_token()
+    except Exception as e:
+        # The expiry check in _ensure_token (and the 401 retry) still cover this
+        logger.warning("Background token refresh failed: %s", e)
+
+
+def _expire_token(headers: Dict[str, str]):
+    """Mark the token sent with these headers as expired, unless it was already replaced"""
+    global token_expiry
+    
+    if headers is _agent_headers:
+        token_expiry = 0
+
+
+def _cancel_token_refresh():
+    """Cancel any scheduled or running background token refresh"""
+    global _refresh_handle, _refresh_task
+    
+    if _refresh_handle is not None:
+        _refresh_handle.cancel()
+        _refresh_handle = None
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        _refresh_task = None
 
 
 async def _ensure_token():
     """Ensure token is still valid, refresh if needed"""
-    global bearer_token, token_expiry
+    if bearer_token is not None and time.monotonic() <= token_expiry:
+        return
     
-    if bearer_token is None or time.time() > token_expiry:
-        await _get_bearer_token()
+    async with _get_token_lock():
+        # Another request may have refreshed it while we waited
+        if bearer_token is None or time.monotonic() > token_expiry:
+            await _request_bearer_token()
 
 
-async def _query_aura_agent(question: str) -> str:
+class _ResponseReader:
+    """Async file-like reader over a streamed response body, for ijson"""
+    
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+        self._pending = b""
+        # Bytes read so far, kept until the response is known to be Format 1
+        self.buffer: Optional[bytearray] = bytearray()
+    
+    async def read(self, size: int = -1) -> bytes:
+        while not self._pending:
+            try:
+                self._pending = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return b""
+        
+        if size < 0 or size >= len(self._pending):
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        
+        if self.buffer is not None:
+            self.buffer += data
+        return data
+
+
+def _content_answer(content: list) -> str:
+    """FORMAT 1: {"content": [{"type": "text", "text": "answer"}, ...]}"""
+    logger.debug("Content items: %d", len(content))
+    
+    # Join all text responses
+    final_answer = "\n".join(
+        item["text"] for item in content if item.get("type") == "text" and item.get("text")
+    )
+    if final_answer:
+        logger.debug("Extracted answer length: %d", len(final_answer))
+        return final_answer
+    
+    logger.warning("No text content found in response")
+    return "No response text found in agent response"
+
+
+# Answer extractors for other dict responses, by the first of these keys present
+# (FORMAT 3: {"answer": "text"}, {"response": "text"} or {"text": "text"})
+_ANSWER_HANDLERS = {
+    "answer": itemgetter("answer"),
+    "response": itemgetter("response"),
+    "text": itemgetter("text"),
+}
+
+
+def _answer_from_result(result) -> str:
+    """Extract the answer text from a fully parsed agent response"""
+    logger.debug("Response type: %s", type(result))
+    
+    # FORMAT 1 is the common case: try it first, a single lookup when it matches
+    # (only a dict can be indexed by a string key among parsed JSON values)
+    try:
+        content = result["content"]
+    except (KeyError, TypeError):
+        pass
+    else:
+        return _content_answer(content)
+    
+    if isinstance(result, dict):
+        key = next((key for key in _ANSWER_HANDLERS if key in result), None)
+        if key is not None:
+            return _ANSWER_HANDLERS[key](result)
+    
+    # FORMAT 2: Direct string response
+    elif isinstance(result, str):
+        logger.debug("String response: %d chars", len(result))
+        return result
+    
+    # FALLBACK: Return JSON
+    logger.warning("Could not parse response, returning JSON")
+    return _dumps_pretty(result)
+
+
+async def _answer_parts(response: httpx.Response) -> AsyncIterator[str]:
+    """
+    Yield the answer text from an agent response as it downloads
+    
+    Format 1 text items are yielded one by one as soon as each is parsed;
+    any other format is parsed once the whole body has arrived.
+    """
+    if not IJSON_AVAILABLE:
+        yield _answer_from_result(_loads(await response.aread()))
+        return
+    
+    reader = _ResponseReader(response)
+    streaming = False
+    item: Optional[dict] = None
+    parts = 0
+    
+    async for prefix, event, value in ijson.parse_async(reader):
+        if not streaming:
+            if prefix == "content" and event == "start_array":
+                # Format 1: stream the items, no need to keep the raw body
+                streaming = True
+                reader.buffer = None
+                logger.debug("Streaming content items")
+        elif prefix == "content.item":
+            if event == "start_map":
+                item = {}
+            elif event == "end_map" and item is not None:
+                text = item.get("text")
+                if item.get("type") == "text" and text:
+                    parts += 1
+                    yield text
+                item = None
+        elif item is not None and event == "string" and prefix in _CONTENT_ITEM_FIELDS:
+            item[_CONTENT_ITEM_FIELDS[prefix]] = value
+    
+    if not streaming:
+        yield _answer_from_result(_loads(bytes(reader.buffer)))
+    elif parts:
+        logger.debug("Streamed %d text items", parts)
+    else:
+        logger.warning("No text content found in response")
+        yield "No response text found in agent response"
+
+
+async def _stream_aura_agent(question: str) -> AsyncIterator[str]:
     """
-    Query Neo4j Aura agent using the endpoint URL
+    Query Neo4j Aura agent using the endpoint URL, yielding the answer as it arrives
     
     Sends:
     - POST to endpoint_url
     - JSON body: {"input": question}
     - Authorization: Bearer token
-    """
-    global bearer_token, endpoint_url
     
+    The answer is the yielded parts joined with newlines.
+    """
     # Ensure token is valid
     await _ensure_token()
     
-    logger.info(f"Querying agent: {endpoint_url}")
-    logger.info(f"Question: {question}")
+    logger.info("Querying agent: %s", endpoint_url)
+    logger.info("Question: %s", question)
     
-    async with httpx.AsyncClient() as client:
-        try:
+    client = _get_client()
+    
+    # Encode the body once; the 401 retry reuses it
+    body = _dumps({"input": question})
+    
+    try:
+        for attempt in range(2):
             # Send request to agent endpoint
-            response = await client.post(
+            headers = _agent_headers
+            async with client.stream(
+                "POST",
                 endpoint_url,
-                headers={
-                    "Authorization": f"Bearer {bearer_token}",
-                    "Content-Type": "application/json",
-                    "Accept": "application/json"
-                },
-                json={"input": question},
+                headers=headers,
+                content=body,
                 timeout=120.0  # 2 minute timeout for complex queries
-            )
-            
-            logger.info(f"Response status: {response.status_code}")
-            
-            # Handle 401 - token expired
-            if response.status_code == 401:
-                logger.warning("Token expired, refreshing...")
-                await _get_bearer_token()
+            ) as response:
+                logger.info("Response status: %s", response.status_code)
                 
-                # Retry request with new token
-                response = await client.post(
-                    endpoint_url,
-                    headers={
-                        "Authorization": f"Bearer {bearer_token}",
-                        "Content-Type": "application/json",
-                        "Accept": "application/json"
-                    },
-                    json={"input": question},
-                    timeout=120.0
-                )
-            
-            # Handle other errors
-            if response.status_code >= 400:
-                logger.error(f"Error {response.status_code}: {response.text}")
-                response.raise_for_status()
-            
-            # Parse response
-            result = response.json()
-            
-            logger.info(f"Response type: {type(result)}")
-            
-            # HANDLE FORMAT 1: {"content": [{"type": "text", "text": "answer"}, ...]}
-            if isinstance(result, dict) and "content" in result:
-                content = result.get("content", [])
-                logger.info(f"Content items: {len(content)}")
-                
-                # Collect all text responses
-                text_parts = []
-                for i, item in enumerate(content):
-                    logger.info(f"Item {i}: type={item.get('type')}")
+                if response.status_code != 401 or attempt > 0:
+                    # Handle other errors
+                    if response.status_code >= 400:
+                        await response.aread()
+                        logger.error("Error %s: %s", response.status_code, response.text)
+                        response.raise_for_status()
                     
-                    if item.get("type") == "text":
-                        text = item.get("text", "")
-                        if text:
-                            text_parts.append(text)
-                
-                # Join all text parts
-                if text_parts:
-                    final_answer = "\n".join(text_parts)
-                    logger.info(f"Extracted answer length: {len(final_answer)}")
-                    return final_answer
-                else:
-                    logger.warning("No text content found in response")
-                    return "No response text found in agent response"
+                    # Parse response
+                    async for part in _answer_parts(response):
+                        yield part
+                    return
             
-            # HANDLE FORMAT 2: Direct string response
-            if isinstance(result, str):
-                logger.info(f"String response: {len(result)} chars")
-                return result
-            
-            # HANDLE FORMAT 3: {"answer": "text"} or {"response": "text"}
-            if isinstance(result, dict):
-                if "answer" in result:
-                    return result.get("answer", "")
-                if "response" in result:
-                    return result.get("response", "")
-                if "text" in result:
-                    return result.get("text", "")
-            
-            # FALLBACK: Return JSON
-            logger.warning("Could not parse response, returning JSON")
-            return json.dumps(result, indent=2)
-            
-        except httpx.HTTPStatusError as e:
-            error_msg = f"HTTP {e.response.status_code}: {e.response.text}"
-            logger.error(error_msg)
-            raise Exception(f"Agent query failed: {error_msg}")
-        except httpx.TimeoutException:
-            logger.error("Request timeout - query too complex or slow")
-            raise Exception("Agent request timed out. Query may be too complex.")
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP Error: {e}")
-            raise Exception(f"Network error: {e}")
-        except json.JSONDecodeError as e:
-            logger.error(f"Response is not valid JSON: {e}")
-            raise Exception(f"Agent returned invalid JSON: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            raise
+            # Handle 401 - token expired, retry request with new token
+            # (concurrent 401s share a single refresh through _ensure_token)
+            logger.warning("Token expired, refreshing...")
+            _expire_token(headers)
+            await _ensure_token()
+        
+    except httpx.HTTPStatusError as e:
+        error_msg = f"HTTP {e.response.status_code}: {e.response.text}"
+        logger.error(error_msg)
+        if e.response.status_code in (401, 403):
+            raise AgentAuthError(f"Agent query failed: {error_msg}") from e
+        raise AgentResponseError(f"Agent query failed: {error_msg}") from e
+    except httpx.TimeoutException:
+        logger.error("Request timeout - query too complex or slow")
+        raise AgentTimeout("Agent request timed out. Query may be too complex.") from None
+    except httpx.HTTPError as e:
+        logger.error("HTTP Error: %s", e)
+        raise AgentError(f"Network error: {e}") from e
+    except _JSON_ERRORS as e:
+        logger.error("Response is not valid JSON: %s", e)
+        raise AgentResponseError(f"Agent returned invalid JSON: {e}") from e
+    except AgentError:
+        # Already logged (e.g. a failed token refresh)
+        raise
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise
+
+
+async def _query_aura_agent(question: str) -> str:
+    """Query Neo4j Aura agent and return the complete answer"""
+    return "\n".join([part async for part in _stream_aura_agent(question)])
+
+
+def _request_done(question: str, pending: "asyncio.Future[str]"):
+    """Forget a finished request, retrieving its error in case every caller was cancelled"""
+    _in_flight.pop(question, None)
+    if not pending.cancelled() and pending.exception() is not None:
+        logger.debug("Request for %r failed: %s", question, pending.exception())
+
+
+async def submit(question: str) -> str:
+    """
+    Ask the agent a question, joining an identical request already in flight
+    
+    Serves ask() callers embedding the agent; the CLI streams answers through
+    _print_answer instead. Only identical questions are coalesced, distinct
+    ones are sent as separate requests.
+    """
+    pending = _in_flight.get(question)
+    
+    if pending is None:
+        pending = asyncio.ensure_future(_query_aura_agent(question))
+        _in_flight[question] = pending
+        pending.add_done_callback(lambda done: _request_done(question, done))
+    
+    # Shield so one caller cancelling does not cancel the request for the others
+    return await asyncio.shield(pending)
+
+
+async def submit_many(questions: List[str]) -> List[str]:
+    """Ask several questions concurrently over the shared client (answers in order)"""
+    return list(await asyncio.gather(*(submit(question) for question in questions)))
+
+
+def _resolve_future(future: asyncio.Future, result=None, error: Optional[BaseException] = None):
+    """Complete a future from the event loop thread, unless it was cancelled"""
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+async def _ainput(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop
+    
+    input() runs in a daemon thread (not the default executor, whose
+    shutdown would wait for a pending read at exit).
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def read_line():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(_resolve_future, future, None, e)
+        else:
+            loop.call_soon_threadsafe(_resolve_future, future, line)
+    
+    threading.Thread(target=read_line, name="agent-input", daemon=True).start()
+    return await future
+
+
+async def _warm_up():
+    """Get the token ready for the next question while the user is typing"""
+    try:
+        await _ensure_token()
+    except Exception as e:
+        # The next question will retry (and report) the token request
+        logger.debug("Token warm-up failed: %s", e)
+
+
+def _start_warm_up():
+    """Run _warm_up() in the background (at most one at a time)"""
+    global _warm_up_task
+    
+    if _warm_up_task is None or _warm_up_task.done():
+        _warm_up_task = asyncio.ensure_future(_warm_up())
+
+
+async def _print_answer(question: str):
+    """Print the agent's answer as each part of it arrives"""
+    separator = "\nAgent: "
+    
+    async for part in _stream_aura_agent(question):
+        print(f"{separator}{part}", end="", flush=True)
+        separator = "\n"
+    
+    print("\n")
+
+
+async def ask(question: str) -> str:
+    """
+    Ask the agent a question and return its answer
+    
+    Entry point for other async code: configuration is loaded on first use,
+    and the HTTP client and bearer token are reused across calls on the same
+    event loop. Call close() when done.
+    """
+    _check_loop()
+    
+    if endpoint_url is None:
+        _load_config()
+    
+    if bearer_token is None:
+        _use_cached_token()
+    
+    return await submit(question)
+
+
+async def close():
+    """Stop the background token refresh and close the shared HTTP client"""
+    global _warm_up_task
+    
+    _check_loop()
+    _cancel_token_refresh()
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
+        _warm_up_task = None
+    await _close_client()
 
 
 async def main():
@@ -230,9 +722,10 @@ async def main():
         # Load configuration
         _load_config()
         
-        # Get initial token
+        # Get initial token (reusing a cached one from a previous run if still valid)
         logger.info("Initializing agent connection...")
-        await _get_bearer_token()
+        if not _use_cached_token():
+            await _get_bearer_token()
         
         # Print header
         print("\n" + "="*80)
@@ -243,11 +736,11 @@ async def main():
         # Interactive loop
         while True:
             try:
-                # Get user input
-                user_input = input("You: ").strip()
+                # Get user input (background tasks keep running while waiting)
+                user_input = (await _ainput("You: ")).strip()
                 
                 # Check for exit
-                if user_input.lower() in ['exit', 'quit', 'bye', 'q']:
+                if user_input.lower() in _EXIT_WORDS:
                     print("\nGoodbye!")
                     break
                 
@@ -258,36 +751,49 @@ async def main():
                 # Show that agent is thinking
                 print("\n[Agent thinking...]")
                 
-                # Query agent
+                # Query agent, printing the answer as it arrives
                 try:
-                    answer = await _query_aura_agent(user_input)
-                    print(f"\nAgent: {answer}\n")
+                    await _print_answer(user_input)
                     
-                except asyncio.TimeoutError:
+                    # Overlap the token check with the user reading the answer
+                    _start_warm_up()
+                    
+                except AgentTimeout:
                     print("\n[Agent request timed out - query too complex]\n")
                 except Exception as e:
                     print(f"\n[Agent error: {str(e)}]\n")
-                    logger.error(f"Agent error: {str(e)}")
+                    logger.error("Agent error: %s", e)
                 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\n\nGoodbye!")
                 break
             except Exception as e:
                 print(f"\nError: {str(e)}\n")
-                logger.error(f"Error: {str(e)}")
+                logger.error("Error: %s", e)
     
     except Exception as e:
         print(f"\nFatal error: {str(e)}")
-        logger.error(f"Fatal error: {str(e)}")
+        logger.error("Fatal error: %s", e)
         print("\nConfiguration required in .env:")
         print("  CLIENT_ID - OAuth client ID")
         print("  CLIENT_SECRET - OAuth client secret")
         print("  ENDPOINT_URL - Agent endpoint URL from Neo4j console")
         return 1
+    finally:
+        await close()
     
     return 0
 
 
 if __name__ == "__main__":
-    exit_code = asyncio.run(main())
+    # Only the CLI switches loops; code importing ask() keeps its own event loop
+    if UVLOOP_AVAILABLE:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
+    try:
+        exit_code = asyncio.run(main())
+    except KeyboardInterrupt:
+        # Ctrl+C cancels main() while it awaits input; its cleanup has already run
+        print("\n\nGoodbye!")
+        exit_code = 0
     exit(exit_code)
\ No newline at end of file